@@ -8,10 +8,12 @@ For state/checkpoint operations, see _session.py.
 
 from __future__ import annotations
 
+import codecs
 import hashlib
 import json
 import os
 import subprocess
+import sys
 import tempfile
 import time
 from contextlib import contextmanager
@@ -58,6 +60,10 @@ VERSION_TRACKING_EXCLUSIONS = [
 # Debug log location - shared across all hooks
 DEBUG_LOG = Path(tempfile.gettempdir()) / "claude-hooks-debug.log"
 
+# Size of the stdin prefix scanned before falling back to a full parse
+# (see read_stdin_fields)
+STDIN_CHUNK_BYTES = 65536
+
 
 # ============================================================================
 # Git Utilities
@@ -153,6 +159,103 @@ def log_debug(
         pass  # Never fail on logging
 
 
+# ============================================================================
+# Hook Input
+# ============================================================================
+
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WS = " \t\n\r"
+
+
+def _scan_fields(text: str, wanted: set[str]) -> dict | None:
+    """Decode top-level fields from a prefix of a JSON object.
+
+    Returns the wanted fields once all of them have been seen or the
+    object closes inside text. Returns None if that point is not reached
+    within text, whether because the prefix is truncated or malformed;
+    the caller then parses the whole input once.
+    """
+    n = len(text)
+
+    def skip_ws(i: int) -> int:
+        while i < n and text[i] in _JSON_WS:
+            i += 1
+        return i
+
+    pos = skip_ws(0)
+    if pos >= n or text[pos] != "{":
+        return None
+    wanted = set(wanted)
+    found: dict = {}
+    pos = skip_ws(pos + 1)
+    if pos < n and text[pos] == "}":
+        return found
+    while wanted:
+        if pos >= n or text[pos] != '"':
+            return None  # Truncated, or a non-string key
+        try:
+            key, pos = _JSON_DECODER.raw_decode(text, pos)
+            pos = skip_ws(pos)
+            if pos >= n or text[pos] != ":":
+                return None
+            value, pos = _JSON_DECODER.raw_decode(text, skip_ws(pos + 1))
+        except json.JSONDecodeError:
+            return None
+        # A value ending at the edge of the prefix (e.g. a number) may be cut off
+        pos = skip_ws(pos)
+        if pos >= n:
+            return None
+        if key in wanted:
+            found[key] = value
+            wanted.discard(key)
+        if text[pos] == "}":
+            break
+        if text[pos] != ",":
+            return None
+        pos = skip_ws(pos + 1)
+    return found
+
+
+def read_stdin_fields(
+    keys: tuple[str, ...], stream=None, chunk_size: int = STDIN_CHUNK_BYTES,
+) -> dict | None:
+    """Read selected top-level fields from hook JSON on stdin.
+
+    Input that fits in one chunk is parsed with json.loads. For larger
+    input the first chunk is scanned, and if every requested key appears
+    there the rest (e.g. a bulky Edit/Write tool_input) is drained from
+    the pipe without being decoded. Otherwise the whole input is read and
+    parsed once with json.loads.
+
+    Returns a dict of the keys found (missing keys are absent), or None if
+    stdin is empty or not a JSON object.
+    """
+    if stream is None:
+        stream = sys.stdin.buffer
+    data = stream.read(chunk_size)
+    if len(data) == chunk_size:
+        try:
+            # The incremental decoder holds back a multi-byte char split at the edge
+            prefix = codecs.getincrementaldecoder("utf-8")().decode(data)
+            found = _scan_fields(prefix, set(keys))
+        except UnicodeDecodeError:
+            found = None
+        if found is not None:
+            # Leaving a large payload unread can make the writer fail with EPIPE
+            while stream.read(65536):
+                pass
+            return found
+        data += stream.read()
+    try:
+        parsed = json.loads(data)
+    except ValueError:  # Bad JSON or bad UTF-8
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    return {key: parsed[key] for key in keys if key in parsed}
+
+
 # ============================================================================
 # TTL & Session Utilities
 # ============================================================================
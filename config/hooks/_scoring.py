@@ -12,7 +12,11 @@ Fresh events bypass the gate to let recency compensate.
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import calendar
+import functools
+import re
+import time
+from datetime import datetime
 
 
 # ============================================================================
@@ -23,6 +27,12 @@ MIN_SCORE_SESSION_START = 0.12
 MIN_SCORE_RECALL = 0.25
 ENTITY_GATE_BYPASS_HOURS = 4
 
+# Age assigned to events with a missing or unparseable timestamp
+UNKNOWN_AGE_HOURS = 999.0
+
+# Fixed event timestamp shape written by _memory.py: %Y-%m-%dT%H:%M:%SZ
+_TS_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})Z\Z")
+
 
 # ============================================================================
 # Concept Synonym Map
@@ -102,24 +112,51 @@ def get_synonyms(term: str) -> frozenset[str]:
 # ============================================================================
 
 
-def event_age_hours(event: dict) -> float:
-    """Calculate event age in hours from its timestamp."""
-    ts = event.get("ts", "")
+@functools.lru_cache(maxsize=4096)
+def ts_epoch(ts: str) -> float | None:
+    """Parse an event timestamp to a Unix epoch (memoized per string).
+
+    The common "%Y-%m-%dT%H:%M:%SZ" shape is parsed with a regex +
+    calendar.timegm; anything else falls back to datetime.fromisoformat.
+    Returns None if unparseable.
+    """
+    m = _TS_RE.match(ts)
+    if m:
+        y, mo, d, h, mi, sec = map(int, m.groups())
+        return float(calendar.timegm((y, mo, d, h, mi, sec, 0, 0, 0)))
     try:
-        event_time = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-        age = (datetime.now(timezone.utc) - event_time).total_seconds() / 3600
-        return max(0.0, age)
-    except (ValueError, TypeError):
-        return 999.0  # Unknown age treated as old
+        parsed = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return float(calendar.timegm(parsed.timetuple())) + parsed.microsecond / 1e6
+    return parsed.timestamp()
+
+
+def event_age_hours(event: dict, now_epoch: float | None = None) -> float:
+    """Calculate event age in hours from its timestamp.
+
+    Pass now_epoch (time.time()) when scoring a batch to avoid re-reading
+    the clock per event.
+    """
+    ts = event.get("ts", "")
+    if not isinstance(ts, str) or not ts:
+        return UNKNOWN_AGE_HOURS  # Unknown age treated as old
+    epoch = ts_epoch(ts)
+    if epoch is None:
+        return UNKNOWN_AGE_HOURS
+    if now_epoch is None:
+        now_epoch = time.time()
+    return max(0.0, (now_epoch - epoch) / 3600)
 
 
-def recency_score(event: dict) -> float:
+def recency_score(event: dict, now_epoch: float | None = None) -> float:
     """Gradual freshness curve: linear 1.0->0.5 over 48h, then exponential decay.
 
     Anchored at 0.5 at the 48h boundary for continuity.
     Half-life 7 days in the exponential portion.
     """
-    age = event_age_hours(event)
+    age = event_age_hours(event, now_epoch)
     if age < 48:
         return 1.0 - (age / 96.0)
     age_days_past_48h = (age - 48) / 24.0
@@ -128,6 +165,7 @@ def recency_score(event: dict) -> float:
 
 def entity_overlap_score(
     event: dict, basenames: set, stems: set, dirs: set,
+    haystack: str | None = None,
 ) -> float:
     """Multi-tier entity matching. Uses max() not average().
 
@@ -137,10 +175,15 @@ def entity_overlap_score(
     - Concept match (0.5): keyword in stems or dirs
     - Substring match (0.35): keyword substring of stem/dir
     - Directory match (0.3): path component in dirs
+
+    haystack is the build_substring_haystack() of stems/dirs; pass it when
+    scoring a batch so the lowercasing happens once per query.
     """
     entities = event.get("entities", [])
     if not entities or not (basenames or stems or dirs):
         return 0.0
+    if haystack is None:
+        haystack = build_substring_haystack(stems, dirs)
     best = 0.0
     for e in entities:
         is_file_entity = "/" in e or "." in e
@@ -156,9 +199,7 @@ def entity_overlap_score(
             e_lower = e.lower()
             if e_lower in stems or e_lower in dirs:
                 best = max(best, 0.5)
-            elif any(e_lower in s.lower() for s in stems) or any(
-                e_lower in d.lower() for d in dirs
-            ):
+            elif haystack and e_lower in haystack:
                 best = max(best, 0.35)
             else:
                 # Synonym expansion: check if entity synonyms match stems/dirs
@@ -190,34 +231,38 @@ def build_file_components(changed_files: set[str]) -> tuple[set, set, set]:
     return basenames, stems, dirs
 
 
+def build_substring_haystack(stems: set, dirs: set) -> str:
+    """Join lowercased stems and dirs into one buffer for substring matching.
+
+    The \x01 separator cannot occur in an entity, so "e in haystack" is
+    true exactly when e is a substring of some individual stem or dir.
+    """
+    return "\x01".join([s.lower() for s in stems] + [d.lower() for d in dirs])
+
+
 # ============================================================================
 # Composite Score
 # ============================================================================
 
 
-def utility_bonus(event: dict, utility_data: dict | None = None) -> float:
-    """Citation-rate bonus for events that have proven helpful.
+def build_utility_eligible(utility_data: dict | None) -> frozenset[str]:
+    """Event IDs that have proven helpful, computed once per scoring batch.
 
-    Events with citation rate >= 30% (min 3 injections) get +0.05.
+    An event qualifies with citation rate >= 30% (min 3 injections).
     This closes the feedback loop: memory_that_helped refs are tracked
     in the manifest's utility field, and events that consistently help
     get boosted in future scoring.
-
-    Returns 0.0 if no utility data or insufficient evidence.
     """
     if not utility_data:
-        return 0.0
-    eid = event.get("id", "")
-    if not eid:
-        return 0.0
-    stats = utility_data.get(eid)
-    if not stats:
-        return 0.0
-    injected = stats.get("injected", 0)
-    cited = stats.get("cited", 0)
-    if injected >= 3 and cited / injected >= 0.30:
-        return 0.05
-    return 0.0
+        return frozenset()
+    eligible = set()
+    for eid, stats in utility_data.items():
+        if not stats:
+            continue
+        injected = stats.get("injected", 0)
+        if injected >= 3 and stats.get("cited", 0) / injected >= 0.30:
+            eligible.add(eid)
+    return frozenset(eligible)
 
 
 def score_event(
@@ -225,15 +270,23 @@ def score_event(
     basenames: set,
     stems: set,
     dirs: set,
-    utility_data: dict | None = None,
+    eligible_ids: frozenset[str] | None = None,
+    now_epoch: float | None = None,
+    haystack: str | None = None,
+    entity_score: float | None = None,
 ) -> float:
     """2-signal scoring + utility bonus: entity overlap (60%) + recency (40%) + citation bonus.
 
     Wider dynamic range than 3-signal — entity overlap provides the
     relevance gate, recency provides the freshness tiebreaker.
-    Utility bonus rewards events that have been cited as helpful.
+    Events in eligible_ids (see build_utility_eligible) get +0.05.
+    Batch callers pass now_epoch and haystack (build_substring_haystack)
+    so the clock read and lowercasing happen once per batch. Callers that
+    already computed entity_overlap_score (e.g. for a gate) pass it as
+    entity_score so it is not recomputed.
     """
-    entity = entity_overlap_score(event, basenames, stems, dirs)
-    recency = recency_score(event)
-    bonus = utility_bonus(event, utility_data)
-    return 0.60 * entity + 0.40 * recency + bonus
+    if entity_score is None:
+        entity_score = entity_overlap_score(event, basenames, stems, dirs, haystack)
+    recency = recency_score(event, now_epoch)
+    bonus = 0.05 if eligible_ids and event.get("id", "") in eligible_ids else 0.0
+    return 0.60 * entity_score + 0.40 * recency + bonus
@@ -7,7 +7,7 @@ single-file, task-agnostic state system:
 
 - One state file: autonomous-state.json (replaces go/melt/appfix/burndown/
   episode/improve state files)
-- Atomic writes via tempfile+fsync+rename (same pattern as _memory.py)
+- Atomic writes via temp file+fsync+rename (O_TMPFILE fast path on Linux)
 - PID-scoped for concurrent session isolation
 
 Exports the same API surface consumed by surviving hooks (deploy-enforcer,
@@ -18,7 +18,6 @@ from __future__ import annotations
 
 import json
 import os
-import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -68,28 +67,105 @@ def _load_state(path: Path) -> dict | None:
         return None
 
 
-def _atomic_write(path: Path, data: dict) -> bool:
-    """Write JSON atomically via temp file + fsync + rename."""
+def _tmp_name(path: Path) -> str:
+    """PID-scoped sibling temp name (no mkstemp randomness; we rename anyway)."""
+    return str(path.parent / f".{path.name}.{os.getpid()}.tmp")
+
+
+def _write_fd(fd: int, payload: bytes) -> None:
+    """Write the full payload to fd and fsync it."""
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(fd, view):]
+    os.fsync(fd)
+
+
+def _unlink_quiet(path: str) -> None:
+    """Remove a file, ignoring errors (best-effort temp cleanup)."""
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        fd, tmp = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _write_via_tmpfile(path: Path, payload: bytes) -> bool:
+    """Linux fast path: unnamed O_TMPFILE inode, linked in once complete.
+
+    linkat() refuses to overwrite, so the inode is linked under the
+    PID-scoped temp name and renamed over the target once written. The
+    link is made before any data is written, so where /proc linking is
+    unsupported (e.g. EXDEV) the fallback does not pay for a wasted
+    write + fsync. Returns False (without side effects) when O_TMPFILE
+    or /proc linking is unsupported.
+    """
+    o_tmpfile = getattr(os, "O_TMPFILE", 0)
+    if not o_tmpfile:
+        return False
+    try:
+        fd = os.open(str(path.parent), o_tmpfile | os.O_WRONLY, 0o600)
+    except OSError:
+        return False
+    tmp = _tmp_name(path)
+    try:
+        _unlink_quiet(tmp)
         try:
-            with os.fdopen(fd, "w") as f:
-                json.dump(data, f, indent=2)
-                f.flush()
-                os.fsync(f.fileno())
-            os.replace(tmp, str(path))
-            return True
-        except Exception:
-            try:
-                os.unlink(tmp)
-            except OSError:
-                pass
+            os.link(f"/proc/self/fd/{fd}", tmp)
+        except OSError:
             return False
-    except (IOError, OSError):
+        _write_fd(fd, payload)
+    except OSError:
+        _unlink_quiet(tmp)
+        return False
+    finally:
+        os.close(fd)
+    try:
+        os.replace(tmp, str(path))
+        return True
+    except OSError:
+        _unlink_quiet(tmp)
         return False
 
 
+def _serialize_state(data: dict) -> bytes:
+    """Encode a state dict once so it can be written to several paths."""
+    return json.dumps(data, indent=2).encode()
+
+
+def _atomic_write_bytes(path: Path, payload: bytes) -> bool:
+    """Write pre-serialized bytes atomically via temp file + fsync + rename."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return False
+    if _write_via_tmpfile(path, payload):
+        return True
+    tmp = _tmp_name(path)
+    _unlink_quiet(tmp)  # Stale leftover from a crashed writer with our PID
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except OSError:
+        return False
+    try:
+        try:
+            _write_fd(fd, payload)
+        finally:
+            os.close(fd)
+        os.replace(tmp, str(path))
+        return True
+    except OSError:
+        _unlink_quiet(tmp)
+        return False
+
+
+def _atomic_write(path: Path, data: dict) -> bool:
+    """Write JSON atomically via temp file + fsync + rename."""
+    try:
+        payload = _serialize_state(data)
+    except (TypeError, ValueError):
+        return False
+    return _atomic_write_bytes(path, payload)
+
+
 # ============================================================================
 # State Queries
 # ============================================================================
@@ -181,14 +257,19 @@ def write_autonomous_state(
         **kwargs,
     }
 
+    try:
+        payload = _serialize_state(state)
+    except (TypeError, ValueError):
+        return False
+
     # Write project-level
     project_path = Path(cwd) / ".claude" / STATE_FILENAME
-    if not _atomic_write(project_path, state):
+    if not _atomic_write_bytes(project_path, payload):
         return False
 
     # Write user-level (for cross-directory detection)
     user_path = Path.home() / ".claude" / STATE_FILENAME
-    return _atomic_write(user_path, state)
+    return _atomic_write_bytes(user_path, payload)
 
 
 # ============================================================================
@@ -254,28 +335,28 @@ def cleanup_checkpoint_only(cwd: str) -> list[str]:
     if not cwd:
         return deleted
 
-    claude_dir = Path(cwd) / ".claude"
-    if not claude_dir.exists():
-        return deleted
-
-    for checkpoint_path in claude_dir.glob("completion-checkpoint*.json"):
-        name = checkpoint_path.name
-        if name != "completion-checkpoint.json":
-            try:
-                pid_str = name.replace("completion-checkpoint.", "").replace(
-                    ".json", ""
-                )
-                pid = int(pid_str)
-                if is_pid_alive(pid):
+    prefix, suffix = "completion-checkpoint", ".json"
+    try:
+        with os.scandir(Path(cwd) / ".claude") as entries:
+            for entry in entries:
+                name = entry.name
+                if not (name.startswith(prefix) and name.endswith(suffix)):
                     continue
-            except ValueError:
-                pass
+                if name != "completion-checkpoint.json":
+                    try:
+                        pid = int(name[len(prefix) + 1:-len(suffix)])
+                        if is_pid_alive(pid):
+                            continue
+                    except ValueError:
+                        pass
 
-        try:
-            checkpoint_path.unlink()
-            deleted.append(str(checkpoint_path))
-        except OSError:
-            pass
+                try:
+                    os.unlink(entry.path)
+                    deleted.append(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass  # No .claude directory
 
     return deleted
 
@@ -364,7 +445,8 @@ def reset_state_for_next_task(cwd: str) -> bool:
     if not _atomic_write(state_path, state):
         return False
 
-    # Update user-level timestamp
+    # Update user-level timestamp only: the user copy may belong to another
+    # session or project, so its other fields must not be overwritten
     user_path = Path.home() / ".claude" / STATE_FILENAME
     if user_path.exists():
         user_state = _load_state(user_path)
@@ -21,18 +21,18 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from _common import is_state_expired, log_debug
-from _session import is_autonomous_mode_active, get_autonomous_state
+from _common import log_debug, read_stdin_fields
+from _session import get_autonomous_state
 
 
-def main():
-    stdin_data = sys.stdin.read()
-    if not stdin_data.strip():
-        sys.exit(0)
+# Only these top-level fields drive the decision; tool_input (often a
+# large Edit/Write payload) is never decoded.
+INPUT_FIELDS = ("cwd", "tool_name", "session_id", "hook_event_name")
+
 
-    try:
-        input_data = json.loads(stdin_data)
-    except json.JSONDecodeError:
+def main():
+    input_data = read_stdin_fields(INPUT_FIELDS)
+    if input_data is None:
         sys.exit(0)
 
     cwd = input_data.get("cwd", os.getcwd())
@@ -40,11 +40,10 @@ def main():
     session_id = input_data.get("session_id", "")
     hook_event = input_data.get("hook_event_name", "")
 
-    if not is_autonomous_mode_active(cwd, session_id):
-        sys.exit(0)
-
+    # Single walk + parse: get_autonomous_state already filters expired
+    # and foreign-session state, so no separate is_active/expiry checks.
     state, mode = get_autonomous_state(cwd, session_id)
-    if state is None or is_state_expired(state):
+    if state is None:
         sys.exit(0)
 
     # Detect event type and use correct output format
@@ -5,8 +5,8 @@ SessionStart Hook - Toolkit Auto-Update (v2)
 Smart auto-update with customization preservation.
 
 Flow:
-1. Fast path: If recently checked and up-to-date, exit immediately
-2. Slow path: Compare local HEAD vs remote origin/main
+1. Fast path: If recently checked (longer back-off when up-to-date), exit immediately
+2. Slow path: Fetch origin/main, compare local HEAD vs FETCH_HEAD
 3. If outdated:
    a. Detect local modifications (dirty files)
    b. Classify overlap with upstream changes
@@ -37,6 +37,7 @@ import hashlib
 import json
 import os
 import re
+import stat
 import subprocess
 import sys
 import tempfile
@@ -48,9 +49,20 @@ from pathlib import Path
 # ============================================================================
 
 CHECK_INTERVAL_MINUTES = 5
+# Interval multiplier when the last check found local == remote
+UP_TO_DATE_BACKOFF_FACTOR = 4
 STATE_FILE = Path.home() / ".claude" / "toolkit-update-state.json"
 DEBUG_LOG = Path(tempfile.gettempdir()) / "claude-hooks-debug.log"
 
+# Splits combined `git diff` output into per-file blocks
+_DIFF_HEADER_RE = re.compile(r"^diff --git ", re.MULTILINE)
+
+# Directory component -> file category, in priority order (after hooks)
+_CATEGORY_BY_DIR = (("skills", "skill"), ("commands", "command"))
+
+# Placeholder markers identifying upstream template files
+_TEMPLATE_RE = re.compile(r"\[YOUR_\w+\]|\[ORG\]|example\.com|Fill this out")
+
 
 def log_debug(message: str) -> None:
     """Append debug message to log file."""
@@ -77,34 +89,34 @@ def get_toolkit_repo_path() -> Path | None:
     """
     hooks_path = Path.home() / ".claude" / "hooks"
 
-    if not hooks_path.exists():
+    try:
+        st = os.lstat(hooks_path)
+    except OSError:
         log_debug("hooks path does not exist")
         return None
 
     # Case 1: Directory symlink (standard install)
-    if hooks_path.is_symlink():
-        try:
-            resolved = hooks_path.resolve()
-            repo_path = resolved.parent.parent
-            if (repo_path / ".git").exists():
-                log_debug(f"found toolkit repo at {repo_path} (directory symlink)")
-                return repo_path
-        except Exception as e:
-            log_debug(f"error resolving directory symlink: {e}")
+    if stat.S_ISLNK(st.st_mode):
+        # realpath(config/hooks) -> parent.parent = repo
+        repo_path = Path(os.path.realpath(hooks_path)).parent.parent
+        if os.path.exists(repo_path / ".git"):
+            log_debug(f"found toolkit repo at {repo_path} (directory symlink)")
+            return repo_path
 
     # Case 2: Real directory with per-file symlinks (user overlay install)
-    if hooks_path.is_dir() and not hooks_path.is_symlink():
-        for child in hooks_path.iterdir():
-            if child.is_symlink() and child.suffix == ".py":
-                try:
-                    resolved = child.resolve()
-                    # resolved is config/hooks/somefile.py -> parent.parent = repo
-                    repo_path = resolved.parent.parent
-                    if (repo_path / ".git").exists():
+    elif stat.S_ISDIR(st.st_mode):
+        try:
+            with os.scandir(hooks_path) as entries:
+                for entry in entries:
+                    if not (entry.name.endswith(".py") and entry.is_symlink()):
+                        continue
+                    # realpath(config/hooks/somefile.py) -> parents[2] = repo
+                    repo_path = Path(os.path.realpath(entry.path)).parents[2]
+                    if os.path.exists(repo_path / ".git"):
                         log_debug(f"found toolkit repo at {repo_path} (per-file symlink)")
                         return repo_path
-                except Exception:
-                    continue
+        except OSError as e:
+            log_debug(f"error scanning hooks directory: {e}")
 
     log_debug("could not resolve toolkit repo path")
     return None
@@ -126,38 +138,72 @@ def load_state() -> dict:
 
 
 def save_state(state: dict) -> None:
-    """Save state file back to disk."""
+    """Save state file back to disk atomically (temp file + os.replace)."""
+    tmp = STATE_FILE.with_name(f".{STATE_FILE.name}.{os.getpid()}.tmp")
     try:
+        data = json.dumps(state, indent=2).encode()
         STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        STATE_FILE.write_text(json.dumps(state, indent=2))
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, STATE_FILE)
     except Exception as e:
         log_debug(f"error saving state file: {e}")
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
 
 
-def get_settings_hash() -> str:
-    """Get SHA256 hash of the effective settings.json content."""
+def get_settings_hash(state: dict | None = None) -> str:
+    """Get SHA256 hash of the effective settings.json content.
+
+    When state is given, the hash is memoized there keyed by the file's
+    (mtime_ns, size), so an unchanged settings.json is only stat'ed.
+    """
     settings_path = Path.home() / ".claude" / "settings.json"
     try:
         if settings_path.exists():
             actual_path = settings_path.resolve() if settings_path.is_symlink() else settings_path
+            st = actual_path.stat()
+            if (
+                state is not None
+                and state.get("settings_file_hash")
+                and state.get("settings_file_mtime_ns") == st.st_mtime_ns
+                and state.get("settings_file_size") == st.st_size
+            ):
+                return state["settings_file_hash"]
             content = actual_path.read_text()
-            return f"sha256:{hashlib.sha256(content.encode()).hexdigest()[:16]}"
+            settings_hash = f"sha256:{hashlib.sha256(content.encode()).hexdigest()[:16]}"
+            if state is not None:
+                state["settings_file_mtime_ns"] = st.st_mtime_ns
+                state["settings_file_size"] = st.st_size
+                state["settings_file_hash"] = settings_hash
+            return settings_hash
     except Exception as e:
         log_debug(f"error hashing settings.json: {e}")
     return "unknown"
 
 
 def should_check_for_updates(state: dict) -> bool:
-    """Determine if enough time has passed since last check."""
+    """Determine if enough time has passed since last check.
+
+    Backs off to UP_TO_DATE_BACKOFF_FACTOR x the interval when the last
+    check left local and remote at the same commit, so sessions started
+    in quick succession skip the network round-trip entirely.
+    """
     last_check = state.get("last_check_timestamp")
     if not last_check:
         return True
+    interval = CHECK_INTERVAL_MINUTES
+    local_at_check = state.get("local_commit_at_check")
+    if local_at_check and local_at_check == state.get("remote_commit_at_check"):
+        interval *= UP_TO_DATE_BACKOFF_FACTOR
     try:
         last_check_str = last_check.replace("Z", "+00:00")
         last_check_time = datetime.fromisoformat(last_check_str)
         now = datetime.now(timezone.utc)
         elapsed = now - last_check_time
-        should_check = elapsed > timedelta(minutes=CHECK_INTERVAL_MINUTES)
+        should_check = elapsed > timedelta(minutes=interval)
         log_debug(f"last check: {last_check}, elapsed: {elapsed}, should_check: {should_check}")
         return should_check
     except (ValueError, TypeError) as e:
@@ -185,16 +231,139 @@ def _git(repo_path: Path, args: list[str], timeout: int = 5) -> subprocess.Compl
         return None
 
 
+def _git_out(repo_path: Path, args: list[str], timeout: int = 5) -> bytes | None:
+    """Run a short read-only git command; return raw stdout, or None on failure.
+
+    For output we only split on ASCII separators: a bare Popen with
+    stderr discarded (one pipe, no CompletedProcess, no decode). Paths
+    are recovered with os.fsdecode so non-UTF-8 names round-trip back
+    into git arguments.
+    """
+    try:
+        proc = subprocess.Popen(
+            ["git"] + args,
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as e:
+        log_debug(f"git {' '.join(args)} failed: {e}")
+        return None
+    try:
+        out, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        proc.kill()
+        proc.communicate()
+        log_debug(f"git {' '.join(args)} failed: {e}")
+        return None
+    return out if proc.returncode == 0 else None
+
+
+class GitCatFile:
+    """Persistent `git cat-file --batch` pipe for reading many blobs.
+
+    One process serves every lookup instead of a `git show` spawn per file.
+    Use as a context manager; get_blob() returns None for missing objects
+    or if the pipe could not be started. Answers are cached per ref, so
+    verify_upstream_hook and classify_file share the upstream
+    auto-update.py read when that file is dirty.
+    """
+
+    def __init__(self, repo_path: Path):
+        self.repo_path = repo_path
+        self._proc: subprocess.Popen | None = None
+        self._blobs: dict[str, bytes | None] = {}
+
+    def __enter__(self) -> "GitCatFile":
+        try:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except (OSError, ValueError) as e:
+            log_debug(f"git cat-file --batch failed to start: {e}")
+            self._proc = None
+        return self
+
+    def __exit__(self, *exc) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+        finally:
+            proc.stdout.close()
+
+    def get_blob(self, ref: str) -> bytes | None:
+        """Return the contents of ref (e.g. "FETCH_HEAD:path"), or None."""
+        if ref in self._blobs:
+            return self._blobs[ref]
+        if self._proc is None or "\n" in ref:
+            return None
+        try:
+            self._proc.stdin.write(ref.encode() + b"\n")
+            self._proc.stdin.flush()
+            header = self._proc.stdout.readline().rstrip(b"\n")
+            # The ref is echoed back verbatim and may contain spaces, so
+            # match the status from the right
+            if header.endswith((b" missing", b" ambiguous")):
+                blob = None
+            else:
+                _, obj_type, size = header.rsplit(b" ", 2)
+                size = int(size)
+                data = self._proc.stdout.read(size + 1)  # content + trailing LF
+                blob = data[:size] if obj_type == b"blob" else None
+            self._blobs[ref] = blob
+            return blob
+        except (OSError, ValueError) as e:
+            log_debug(f"git cat-file read failed for {ref}: {e}")
+            self.__exit__()
+            return None
+
+
 def get_local_head(repo_path: Path) -> str | None:
-    result = _git(repo_path, ["rev-parse", "HEAD"])
-    return result.stdout.strip() if result and result.returncode == 0 else None
+    out = _git_out(repo_path, ["rev-parse", "HEAD"])
+    return out.strip().decode() if out else None
 
 
-def get_remote_head(repo_path: Path) -> str | None:
-    result = _git(repo_path, ["ls-remote", "origin", "main"], timeout=15)
-    if result and result.returncode == 0 and result.stdout:
-        return result.stdout.split()[0]
-    return None
+def get_heads(repo_path: Path) -> tuple[str | None, str | None]:
+    """Resolve (HEAD, FETCH_HEAD) with one rev-parse (run after git fetch)."""
+    out = _git_out(repo_path, ["rev-parse", "HEAD", "FETCH_HEAD"])
+    if out:
+        lines = out.split()
+        if len(lines) == 2:
+            return lines[0].decode(), lines[1].decode()
+    return None, None
+
+
+def fetch_head_is_fresh(repo_path: Path) -> bool:
+    """True if FETCH_HEAD records a fetch of main within CHECK_INTERVAL_MINUTES.
+
+    Lets the slow path reuse a fetch the user (or a concurrent session)
+    just made. Only the for-merge 'main' line counts, so FETCH_HEAD left
+    by fetching another branch never masquerades as origin/main.
+    """
+    fetch_head = repo_path / ".git" / "FETCH_HEAD"
+    try:
+        age = datetime.now().timestamp() - fetch_head.stat().st_mtime
+        if age < 0 or age > CHECK_INTERVAL_MINUTES * 60:
+            return False
+        with open(fetch_head) as f:
+            fields = f.readline().rstrip("\n").split("\t")
+    except OSError:
+        return False  # No FETCH_HEAD yet, or .git is a worktree file
+    return (
+        len(fields) == 3
+        and fields[1] == ""
+        and fields[2].startswith("branch 'main' of ")
+    )
 
 
 def git_fetch(repo_path: Path) -> bool:
@@ -211,24 +380,18 @@ def git_pull_ff(repo_path: Path) -> tuple[bool, str]:
     return False, result.stderr.strip()
 
 
-def get_commit_summary(repo_path: Path, from_commit: str, to_commit: str) -> str:
+def get_commit_log(repo_path: Path, from_commit: str, to_commit: str) -> list[str]:
+    """One-line log of from..to; its length doubles as the commit count."""
     result = _git(repo_path, ["log", "--oneline", f"{from_commit}..{to_commit}"])
-    if result and result.returncode == 0 and result.stdout.strip():
-        lines = result.stdout.strip().split("\n")
-        if len(lines) <= 5:
-            return result.stdout.strip()
-        return f"{lines[0]}\n{lines[1]}\n{lines[2]}\n... and {len(lines) - 3} more commits"
-    return ""
+    if result and result.returncode == 0:
+        return result.stdout.strip().splitlines()
+    return []
 
 
-def get_commit_count(repo_path: Path, from_commit: str, to_commit: str) -> int:
-    result = _git(repo_path, ["rev-list", "--count", f"{from_commit}..{to_commit}"])
-    if result and result.returncode == 0:
-        try:
-            return int(result.stdout.strip())
-        except ValueError:
-            pass
-    return 0
+def format_commit_summary(lines: list[str]) -> str:
+    if len(lines) <= 5:
+        return "\n".join(lines)
+    return f"{lines[0]}\n{lines[1]}\n{lines[2]}\n... and {len(lines) - 3} more commits"
 
 
 # ============================================================================
@@ -237,67 +400,64 @@ def get_commit_count(repo_path: Path, from_commit: str, to_commit: str) -> int:
 
 
 def get_dirty_files(repo_path: Path) -> list[str]:
-    """Get files with uncommitted changes (staged + unstaged + untracked in config/)."""
-    dirty = set()
-
-    # Unstaged changes
-    result = _git(repo_path, ["diff", "--name-only"])
-    if result and result.returncode == 0:
-        dirty.update(f for f in result.stdout.strip().split("\n") if f)
-
-    # Staged changes
-    result = _git(repo_path, ["diff", "--cached", "--name-only"])
-    if result and result.returncode == 0:
-        dirty.update(f for f in result.stdout.strip().split("\n") if f)
-
+    """Get tracked files with uncommitted changes (staged + unstaged)."""
+    out = _git_out(
+        repo_path,
+        ["status", "--porcelain=v1", "-z", "--no-renames", "--untracked-files=no"],
+    )
+    if out is None:
+        return []
+    # Entries are "XY <path>"; -z keeps paths unquoted
+    dirty = {
+        os.fsdecode(entry[3:]) for entry in out.split(b"\0")
+        if len(entry) > 3 and not entry.startswith((b"??", b"!!"))
+    }
     return sorted(dirty)
 
 
 def get_upstream_changed_files(repo_path: Path) -> list[str]:
     """Get files changed between HEAD and FETCH_HEAD (run after git fetch)."""
-    result = _git(repo_path, ["diff", "--name-only", "HEAD..FETCH_HEAD"])
-    if result and result.returncode == 0:
-        return [f for f in result.stdout.strip().split("\n") if f]
-    return []
-
-
-def get_file_diff_stats(repo_path: Path, filepath: str) -> int:
-    """Get approximate lines changed for a dirty file."""
-    result = _git(repo_path, ["diff", "--numstat", "--", filepath])
-    if result and result.returncode == 0:
-        for line in result.stdout.strip().split("\n"):
-            parts = line.split("\t")
-            if len(parts) >= 2:
+    out = _git_out(repo_path, ["diff", "--name-only", "-z", "HEAD..FETCH_HEAD"])
+    return [os.fsdecode(f) for f in out.split(b"\0") if f] if out else []
+
+
+def get_diff_stats(repo_path: Path) -> dict[str, int]:
+    """Get approximate lines changed per dirty file (staged + unstaged vs HEAD)."""
+    stats: dict[str, int] = {}
+    out = _git_out(repo_path, ["diff", "--numstat", "-z", "--no-renames", "HEAD"])
+    if out:
+        for entry in out.split(b"\0"):
+            parts = entry.split(b"\t", 2)
+            if len(parts) == 3:
+                path = os.fsdecode(parts[2])
                 try:
-                    return int(parts[0]) + int(parts[1])
+                    stats[path] = int(parts[0]) + int(parts[1])
                 except ValueError:
-                    pass
-    return 0
+                    stats[path] = 0  # Binary file ("-\t-")
+    return stats
 
 
-def classify_file(filepath: str, repo_path: Path) -> dict:
+def classify_file(filepath: str, catfile: GitCatFile) -> dict:
     """Classify a file by its category and template status."""
-    if filepath.endswith(".json") and "settings" in filepath:
+    parts = filepath.split("/")
+    name = parts[-1]
+    dirs = set(parts[1:-1])  # "/<dir>/" components, as the old substring checks
+    if name.endswith(".json") and "settings" in filepath:
         category = "config"
-    elif "/hooks/" in filepath and os.path.basename(filepath).startswith("_"):
-        category = "hook_module"
-    elif "/hooks/" in filepath:
-        category = "hook"
-    elif "/skills/" in filepath:
-        category = "skill"
-    elif "/commands/" in filepath:
-        category = "command"
-    elif filepath.endswith("CLAUDE.md"):
-        category = "instructions"
+    elif "hooks" in dirs:
+        category = "hook_module" if name.startswith("_") else "hook"
     else:
-        category = "other"
+        category = next(
+            (cat for d, cat in _CATEGORY_BY_DIR if d in dirs),
+            "instructions" if name.endswith("CLAUDE.md") else "other",
+        )
 
     # Detect template files by checking upstream for placeholder patterns
     is_template = False
-    result = _git(repo_path, ["show", f"FETCH_HEAD:{filepath}"])
-    if result and result.returncode == 0:
+    upstream = catfile.get_blob(f"FETCH_HEAD:{filepath}")
+    if upstream is not None:
         is_template = bool(
-            re.search(r"\[YOUR_\w+\]|\[ORG\]|example\.com|Fill this out", result.stdout)
+            _TEMPLATE_RE.search(upstream.decode("utf-8", errors="replace"))
         )
 
     return {"category": category, "is_template": is_template}
@@ -307,13 +467,15 @@ def classify_dirty_files(
     repo_path: Path,
     dirty_files: list[str],
     upstream_changed: list[str],
+    catfile: GitCatFile,
 ) -> list[dict]:
     """Classify each dirty file with overlap and category info."""
     upstream_set = set(upstream_changed)
+    stats = get_diff_stats(repo_path)
     results = []
     for f in dirty_files:
-        info = classify_file(f, repo_path)
-        lines = get_file_diff_stats(repo_path, f)
+        info = classify_file(f, catfile)
+        lines = stats.get(f, 0)
         results.append({
             "path": f,
             "overlap": f in upstream_set,
@@ -329,11 +491,11 @@ def classify_dirty_files(
 # ============================================================================
 
 
-def create_backup_branch(repo_path: Path) -> str | None:
-    """Create a backup branch from current state (includes uncommitted via stash ref)."""
+def create_backup_branch(repo_path: Path, start_point: str = "HEAD") -> str | None:
+    """Create a backup branch at start_point (the pre-update commit)."""
     ts = datetime.now().strftime("%Y%m%d-%H%M%S")
     branch_name = f"toolkit-backup-{ts}"
-    result = _git(repo_path, ["branch", branch_name])
+    result = _git(repo_path, ["branch", branch_name, start_point])
     if result and result.returncode == 0:
         log_debug(f"created backup branch: {branch_name}")
         return branch_name
@@ -370,14 +532,14 @@ def stash_pull_pop(repo_path: Path) -> tuple[bool, str]:
     return False, f"Stash pop conflict: {pop_result.stderr if pop_result else 'timeout'}"
 
 
-def verify_upstream_hook(repo_path: Path) -> bool:
+def verify_upstream_hook(catfile: GitCatFile) -> bool:
     """Verify the upstream auto-update.py compiles (bootstrap safety)."""
-    result = _git(repo_path, ["show", "FETCH_HEAD:config/hooks/auto-update.py"])
-    if not result or result.returncode != 0:
+    source = catfile.get_blob("FETCH_HEAD:config/hooks/auto-update.py")
+    if source is None:
         return True  # Can't check, assume valid
 
     try:
-        compile(result.stdout, "auto-update.py", "exec")
+        compile(source, "auto-update.py", "exec")
         log_debug("upstream auto-update.py syntax OK")
         return True
     except SyntaxError as e:
@@ -390,17 +552,19 @@ def verify_upstream_hook(repo_path: Path) -> bool:
 # ============================================================================
 
 
-def deep_merge(base: dict, override: dict) -> dict:
-    """Deep merge override into base. Override wins for scalars. Arrays replace."""
-    from copy import deepcopy
+def _merge_into(base: dict, override: dict) -> dict:
+    """Deep merge override into base in place. Override wins for scalars. Arrays replace.
 
-    result = deepcopy(base)
+    Both trees are freshly parsed from JSON and serialized right after,
+    so nothing else aliases them and no copies are needed. Returns base.
+    """
     for key, value in override.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = deep_merge(result[key], value)
+        current = base.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            _merge_into(current, value)
         else:
-            result[key] = deepcopy(value)
-    return result
+            base[key] = value
+    return base
 
 
 def merge_settings_if_needed(repo_path: Path) -> bool:
@@ -416,19 +580,27 @@ def merge_settings_if_needed(repo_path: Path) -> bool:
     target_path = Path.home() / ".claude" / "settings.json"
 
     try:
-        base = json.loads(base_path.read_text())
         local = json.loads(local_path.read_text())
 
         # Strip comments (keys starting with _)
         local_clean = {k: v for k, v in local.items() if not k.startswith("_")}
 
-        merged = deep_merge(base, local_clean)
+        # No overrides and target still links to base: already up to date
+        if not local_clean and target_path.resolve() == base_path.resolve():
+            log_debug("settings.local.json has no override keys, skipping merge")
+            return False
+
+        base = json.loads(base_path.read_text())
+        merged = json.dumps(_merge_into(base, local_clean), indent=2) + "\n"
 
         # Replace symlink with real file if needed
         if target_path.is_symlink():
             target_path.unlink()
+        elif target_path.exists() and target_path.read_text() == merged:
+            log_debug("merged settings unchanged, skipping write")
+            return False
 
-        target_path.write_text(json.dumps(merged, indent=2) + "\n")
+        target_path.write_text(merged)
         log_debug(f"merged settings.local.json ({len(local_clean)} override keys)")
         return True
     except (json.JSONDecodeError, IOError) as e:
@@ -441,15 +613,54 @@ def merge_settings_if_needed(repo_path: Path) -> bool:
 # ============================================================================
 
 
-def get_user_diff_content(repo_path: Path, filepath: str, max_lines: int = 30) -> str:
-    """Get the diff content for a dirty file, truncated if long."""
-    result = _git(repo_path, ["diff", "--", filepath])
-    if result and result.returncode == 0 and result.stdout.strip():
-        lines = result.stdout.strip().split("\n")
-        if len(lines) > max_lines:
-            return "\n".join(lines[: max_lines - 2]) + f"\n... ({len(lines) - max_lines + 2} more lines)"
-        return result.stdout.strip()
-    return "(no diff available)"
+def _truncate_diff(diff: str, max_lines: int) -> str:
+    """Truncate a diff to max_lines, noting how many lines were dropped.
+
+    Slices at the cut point instead of splitting every line of a large
+    diff into a list that is mostly thrown away.
+    """
+    total = diff.count("\n") + 1
+    if total <= max_lines:
+        return diff
+    cut = -1
+    for _ in range(max_lines - 2):
+        cut = diff.find("\n", cut + 1)
+    return diff[:cut] + f"\n... ({total - max_lines + 2} more lines)"
+
+
+def get_user_diffs_batch(
+    repo_path: Path, paths: list[str], max_lines: int = 30,
+) -> dict[str, str]:
+    """Get truncated diff content for several dirty files with one git diff.
+
+    The combined output is split on its "diff --git a/<p> b/<p>" headers.
+    Files with no diff (or an unrecognized header) are absent from the
+    result.
+    """
+    if not paths:
+        return {}
+    # Pin the header format against user config (diff.mnemonicPrefix,
+    # diff.noprefix, external diff drivers, color) so by_header matches
+    result = _git(
+        repo_path,
+        [
+            "-c", "core.quotePath=false", "diff", "--no-renames", "--no-ext-diff",
+            "--no-color", "--src-prefix=a/", "--dst-prefix=b/", "--",
+        ] + paths,
+    )
+    if not result or result.returncode != 0 or not result.stdout.strip():
+        return {}
+    by_header = {f"diff --git a/{p} b/{p}": p for p in paths}
+    diffs = {}
+    for block in _DIFF_HEADER_RE.split(result.stdout):
+        block = block.strip()
+        if not block:
+            continue
+        block = "diff --git " + block
+        path = by_header.get(block.split("\n", 1)[0])
+        if path:
+            diffs[path] = _truncate_diff(block, max_lines)
+    return diffs
 
 
 def output_agent_instructions(
@@ -467,6 +678,7 @@ def output_agent_instructions(
     safe_files = [f for f in classified_files if not f["overlap"]]
 
     # Build per-file detail blocks
+    user_diffs = get_user_diffs_batch(repo_path, [f["path"] for f in overlap_files])
     file_blocks = []
     for f in classified_files:
         block = [
@@ -477,7 +689,7 @@ def output_agent_instructions(
             f"    lines_changed: {f['lines_changed']}",
         ]
         if f["overlap"]:
-            diff = get_user_diff_content(repo_path, f["path"])
+            diff = user_diffs.get(f["path"], "(no diff available)")
             block.append("    user_diff: |")
             for line in diff.split("\n"):
                 block.append(f"      {line}")
@@ -561,17 +773,17 @@ def main():
         sys.exit(0)
 
     state = load_state()
-    current_settings_hash = get_settings_hash()
+    current_settings_hash = get_settings_hash(state)
 
     # Check for pending restart
     pending_restart = state.get("pending_restart_reason")
     if pending_restart:
         stored_hash = state.get("settings_hash_at_session_start")
         if stored_hash and stored_hash != current_settings_hash:
+            # Persisted by whichever path below finishes this run
             log_debug("pending restart cleared - settings hash changed")
             state["pending_restart_reason"] = None
             state["settings_hash_at_session_start"] = current_settings_hash
-            save_state(state)
         else:
             print(f"""
 TOOLKIT RESTART REQUIRED
@@ -591,10 +803,19 @@ ACTION: Exit this session and start a new one.
 
     # Slow path: check for updates
     log_debug("checking for updates...")
-    local_head = get_local_head(repo_path)
-    remote_head = get_remote_head(repo_path)
     now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
+    # Fetch (unless FETCH_HEAD already holds a fresh main), then resolve
+    # both heads in a single rev-parse
+    if not fetch_head_is_fresh(repo_path) and not git_fetch(repo_path):
+        log_debug("fetch failed")
+        state["last_check_timestamp"] = now
+        state["last_check_result"] = "fetch_failed"
+        state["settings_hash_at_session_start"] = current_settings_hash
+        save_state(state)
+        sys.exit(0)
+
+    local_head, remote_head = get_heads(repo_path)
     if not local_head or not remote_head:
         log_debug(f"version check failed: local={local_head}, remote={remote_head}")
         state["last_check_timestamp"] = now
@@ -620,98 +841,92 @@ ACTION: Exit this session and start a new one.
     log_debug(f"updates available: {local_head[:7]} -> {remote_head[:7]}")
     settings_hash_before = current_settings_hash
 
-    # Step 1: Fetch
-    if not git_fetch(repo_path):
-        log_debug("fetch failed")
-        state["last_check_timestamp"] = now
-        state["last_check_result"] = "fetch_failed"
-        state["settings_hash_at_session_start"] = current_settings_hash
-        save_state(state)
-        sys.exit(0)
+    # One log serves both the commit count and every summary below
+    commit_log = get_commit_log(repo_path, local_head, remote_head)
+    commit_summary = format_commit_summary(commit_log)
 
-    commit_count = get_commit_count(repo_path, local_head, "FETCH_HEAD")
-
-    # Step 2: Bootstrap safety
-    if not verify_upstream_hook(repo_path):
-        state["last_check_timestamp"] = now
-        state["last_check_result"] = "upstream_syntax_error"
-        save_state(state)
-        print("toolkit update skipped: upstream hook has syntax error. Will retry next session.")
-        sys.exit(0)
-
-    # Step 3: Detect dirty files
-    dirty_files = get_dirty_files(repo_path)
-
-    if not dirty_files:
-        # Clean tree — simple pull
-        log_debug("clean working tree, proceeding with ff pull")
-        success, message = git_pull_ff(repo_path)
-        if not success:
-            log_debug(f"pull failed: {message}")
+    # One cat-file pipe serves every FETCH_HEAD blob lookup below
+    with GitCatFile(repo_path) as catfile:
+        # Step 2: Bootstrap safety
+        if not verify_upstream_hook(catfile):
             state["last_check_timestamp"] = now
-            state["last_check_result"] = "update_failed"
-            state["settings_hash_at_session_start"] = current_settings_hash
+            state["last_check_result"] = "upstream_syntax_error"
             save_state(state)
-            print(f"toolkit update failed: {message}")
+            print("toolkit update skipped: upstream hook has syntax error. Will retry next session.")
             sys.exit(0)
 
-        merge_settings_if_needed(repo_path)
-        _report_success(repo_path, state, local_head, remote_head, now, settings_hash_before)
-        sys.exit(0)
-
-    # Step 4: Classify dirty files
-    log_debug(f"dirty files: {dirty_files}")
-    upstream_changed = get_upstream_changed_files(repo_path)
-    classified = classify_dirty_files(repo_path, dirty_files, upstream_changed)
-
-    overlap_files = [f for f in classified if f["overlap"]]
-    safe_files = [f for f in classified if not f["overlap"]]
-    log_debug(f"overlap: {len(overlap_files)}, safe: {len(safe_files)}")
-
-    if not overlap_files:
-        # No overlap — safe stash + pull + pop
-        log_debug("no overlap, attempting stash-pull-pop")
-        backup = create_backup_branch(repo_path)
+        # Step 3: Detect dirty files
+        dirty_files = get_dirty_files(repo_path)
+
+        if not dirty_files:
+            # Clean tree — simple pull
+            log_debug("clean working tree, proceeding with ff pull")
+            success, message = git_pull_ff(repo_path)
+            if not success:
+                log_debug(f"pull failed: {message}")
+                state["last_check_timestamp"] = now
+                state["last_check_result"] = "update_failed"
+                state["settings_hash_at_session_start"] = current_settings_hash
+                save_state(state)
+                print(f"toolkit update failed: {message}")
+                sys.exit(0)
 
-        success, message = stash_pull_pop(repo_path)
-        if success:
             merge_settings_if_needed(repo_path)
-            extra = (
-                f"Your local changes to {len(safe_files)} file(s) were preserved (no upstream conflicts)."
-            )
-            if backup:
-                extra += f" Backup: {backup}"
-            _report_success(repo_path, state, local_head, remote_head, now, settings_hash_before, extra)
+            _report_success(repo_path, state, local_head, remote_head, now, settings_hash_before, commit_summary)
             sys.exit(0)
-        else:
-            log_debug(f"stash-pull-pop failed: {message}")
-            # Fall through to agent path
-
-    # Step 5: Overlap or stash failure — delegate to agent
-    log_debug("delegating to agent for smart merge")
-    backup = create_backup_branch(repo_path)
-
-    settings_changed_upstream = "config/settings.json" in set(upstream_changed)
-    commit_summary = get_commit_summary(repo_path, local_head[:7], remote_head[:7])
-
-    output_agent_instructions(
-        repo_path=repo_path,
-        local_head=local_head,
-        remote_head=remote_head,
-        classified_files=classified,
-        commit_summary=commit_summary,
-        commit_count=commit_count,
-        backup_branch=backup,
-        settings_changed_upstream=settings_changed_upstream,
-    )
 
-    state["last_check_timestamp"] = now
-    state["last_check_result"] = "agent_merge_requested"
-    state["local_commit_at_check"] = local_head[:7]
-    state["remote_commit_at_check"] = remote_head[:7]
-    state["settings_hash_at_session_start"] = current_settings_hash
-    save_state(state)
-    sys.exit(0)
+        # Step 4: Classify dirty files
+        log_debug(f"dirty files: {dirty_files}")
+        upstream_changed = get_upstream_changed_files(repo_path)
+        classified = classify_dirty_files(
+            repo_path, dirty_files, upstream_changed, catfile,
+        )
+
+        overlap_files = [f for f in classified if f["overlap"]]
+        safe_files = [f for f in classified if not f["overlap"]]
+        log_debug(f"overlap: {len(overlap_files)}, safe: {len(safe_files)}")
+
+        if not overlap_files:
+            # No overlap — safe stash + pull + pop
+            log_debug("no overlap, attempting stash-pull-pop")
+            success, message = stash_pull_pop(repo_path)
+            if success:
+                merge_settings_if_needed(repo_path)
+                extra = (
+                    f"Your local changes to {len(safe_files)} file(s) were preserved (no upstream conflicts)."
+                )
+                _report_success(repo_path, state, local_head, remote_head, now, settings_hash_before, commit_summary, extra)
+                sys.exit(0)
+            else:
+                log_debug(f"stash-pull-pop failed: {message}")
+                # Fall through to agent path
+
+        # Step 5: Overlap or stash failure — delegate to agent
+        log_debug("delegating to agent for smart merge")
+        # Created only now, and at local_head: a failed stash pop has
+        # already fast-forwarded HEAD past the commit worth preserving
+        backup = create_backup_branch(repo_path, local_head)
+
+        settings_changed_upstream = "config/settings.json" in set(upstream_changed)
+
+        output_agent_instructions(
+            repo_path=repo_path,
+            local_head=local_head,
+            remote_head=remote_head,
+            classified_files=classified,
+            commit_summary=commit_summary,
+            commit_count=len(commit_log),
+            backup_branch=backup,
+            settings_changed_upstream=settings_changed_upstream,
+        )
+
+        state["last_check_timestamp"] = now
+        state["last_check_result"] = "agent_merge_requested"
+        state["local_commit_at_check"] = local_head[:7]
+        state["remote_commit_at_check"] = remote_head[:7]
+        state["settings_hash_at_session_start"] = current_settings_hash
+        save_state(state)
+        sys.exit(0)
 
 
 def _report_success(
@@ -721,6 +936,7 @@ def _report_success(
     remote_head: str,
     now: str,
     settings_hash_before: str,
+    commit_summary: str,
     extra_msg: str = "",
 ) -> None:
     """Report successful update and persist state."""
@@ -738,18 +954,16 @@ toolkit: local ({new_local_head[:7]}) ahead of remote ({remote_head[:7]}). Auto-
 """)
         return
 
-    settings_hash_after = get_settings_hash()
+    settings_hash_after = get_settings_hash(state)
     settings_changed = settings_hash_before != settings_hash_after
-    commit_summary = get_commit_summary(repo_path, local_head[:7], remote_head[:7])
 
-    history = state.get("update_history", [])
-    history.insert(0, {
+    entry = {
         "timestamp": now,
         "from_commit": local_head[:7],
         "to_commit": remote_head[:7],
         "settings_changed": settings_changed,
-    })
-    state["update_history"] = history[:5]
+    }
+    state["update_history"] = [entry, *state.get("update_history", [])[:4]]
     state["last_check_timestamp"] = now
     state["last_check_result"] = "updated"
     state["local_commit_at_check"] = remote_head[:7]
@@ -15,19 +15,22 @@ Hook event: PostToolUse (matcher: *)
 from __future__ import annotations
 
 import json
+import os
 import subprocess
 import sys
 import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
-from _common import log_debug, timed_hook, get_code_version, is_state_expired
+from _common import log_debug, timed_hook, get_code_version, is_state_expired, read_stdin_fields
 from _session import get_autonomous_state, load_checkpoint
 
 # Thresholds
 COMMIT_STALENESS_MINUTES = 30  # Warn if no commit in 30 min during autonomous mode
 CHECK_INTERVAL_SECONDS = 120   # Don't check more often than every 2 minutes
-LAST_CHECK_FILE = ".claude/health-monitor-last-check.json"
+LAST_CHECK_FILE = ".claude/health-monitor-last-check"  # Empty sentinel; mtime = last check
+# Well under the 5s hook budget this check shares with verification-monitor
+GIT_TIMEOUT_SECONDS = 2
 
 
 def _minutes_since_last_commit(cwd: str) -> float | None:
@@ -35,7 +38,7 @@ def _minutes_since_last_commit(cwd: str) -> float | None:
     try:
         result = subprocess.run(
             ["git", "log", "-1", "--format=%ct"],
-            cwd=cwd, capture_output=True, text=True, timeout=5,
+            cwd=cwd, capture_output=True, text=True, timeout=GIT_TIMEOUT_SECONDS,
         )
         if result.returncode == 0 and result.stdout.strip():
             commit_epoch = int(result.stdout.strip())
@@ -47,16 +50,11 @@ def _minutes_since_last_commit(cwd: str) -> float | None:
 
 def _should_check(cwd: str) -> bool:
     """Rate-limit health checks to avoid performance drag."""
-    check_file = Path(cwd) / LAST_CHECK_FILE
     try:
-        if check_file.exists():
-            data = json.loads(check_file.read_text())
-            last_ts = data.get("last_check", 0)
-            if time.time() - last_ts < CHECK_INTERVAL_SECONDS:
-                return False
-    except (json.JSONDecodeError, IOError):
-        pass
-    return True
+        last_ts = os.stat(Path(cwd) / LAST_CHECK_FILE).st_mtime
+    except OSError:
+        return True
+    return time.time() - last_ts >= CHECK_INTERVAL_SECONDS
 
 
 def _record_check(cwd: str) -> None:
@@ -64,31 +62,36 @@ def _record_check(cwd: str) -> None:
     check_file = Path(cwd) / LAST_CHECK_FILE
     try:
         check_file.parent.mkdir(parents=True, exist_ok=True)
-        check_file.write_text(json.dumps({"last_check": time.time()}))
-    except IOError:
+        check_file.touch()
+    except OSError:
         pass
 
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)
+# Only envelope fields are read; both precede tool_response, so a
+# large response is drained without being decoded
+INPUT_FIELDS = ("cwd", "session_id")
+
 
+def check(input_data: dict) -> str | None:
+    """Run the health checks for one PostToolUse event.
+
+    Returns the advisory text, or None when there is nothing to report.
+    Shared by main() and posttool-dispatcher.py.
+    """
     cwd = input_data.get("cwd", "")
     session_id = input_data.get("session_id", "")
 
     if not cwd:
-        sys.exit(0)
+        return None
 
     # Only monitor in autonomous mode
     state, mode = get_autonomous_state(cwd, session_id)
     if not state:
-        sys.exit(0)
+        return None
 
     # Rate-limit checks
     if not _should_check(cwd):
-        sys.exit(0)
+        return None
 
     _record_check(cwd)
 
@@ -121,26 +124,33 @@ def main():
             )
 
     if not warnings:
-        sys.exit(0)
+        return None
 
     # Build advisory
     parts = ["HEALTH MONITOR:"]
     for w in warnings:
         parts.append(f"  - {w}")
 
-    output = {
-        "hookSpecificOutput": {
-            "hookEventName": "PostToolUse",
-            "additionalContext": "\n".join(parts),
-        }
-    }
-
     log_debug(
         f"Health monitor: {len(warnings)} warning(s)",
         hook_name="autonomous-health-monitor",
     )
+    return "\n".join(parts)
+
+
+def main():
+    input_data = read_stdin_fields(INPUT_FIELDS)
+    if input_data is None:
+        sys.exit(0)
 
-    print(json.dumps(output))
+    context = check(input_data)
+    if context:
+        print(json.dumps({
+            "hookSpecificOutput": {
+                "hookEventName": "PostToolUse",
+                "additionalContext": context,
+            }
+        }))
     sys.exit(0)
 
 
@@ -18,6 +18,7 @@ Hook event: PostToolUse (matcher: Bash)
 from __future__ import annotations
 
 import json
+import os
 import re
 import sys
 import time
@@ -28,7 +29,7 @@ from _common import log_debug, timed_hook
 from _session import is_autonomous_mode_active
 
 # Error pattern → advisory message mapping
-ERROR_PATTERNS = [
+_RAW_ERROR_PATTERNS = [
     # Python errors
     (r"ModuleNotFoundError: No module named '([^']+)'",
      "Missing Python module '{0}'. Check: virtual env active? Package installed? Correct import path?"),
@@ -79,7 +80,7 @@ ERROR_PATTERNS = [
 ]
 
 # Deploy failure patterns → rollback advisory
-DEPLOY_FAILURE_PATTERNS = [
+_RAW_DEPLOY_FAILURE_PATTERNS = [
     (r"exit status (\d+)",
      "Workflow/command failed (exit {0}). Check: gh run view --log-failed. "
      "Rollback: git revert HEAD && git push, or re-trigger with fixes."),
@@ -98,25 +99,78 @@ DEPLOY_FAILURE_PATTERNS = [
      "Service returning errors post-deploy. Check health endpoints and rollback if needed."),
 ]
 
+# Compiled once at import: the hook fires after every Bash call
+ERROR_PATTERNS = tuple(
+    (re.compile(p, re.IGNORECASE), msg) for p, msg in _RAW_ERROR_PATTERNS
+)
+DEPLOY_FAILURE_PATTERNS = tuple(
+    (re.compile(p, re.IGNORECASE), msg) for p, msg in _RAW_DEPLOY_FAILURE_PATTERNS
+)
+
+# Substring prefilters (lowercase): every pattern above can only match
+# output containing at least one of its table's tokens, so clean output
+# skips the regex scan. Keep in sync when adding patterns.
+_ERROR_TOKENS = (
+    "error", "err_module", "cannot", "conflict", "denied", "eacces",
+    "refused", "does not exist", "failed", "etimedout", "enotfound",
+)
+_DEPLOY_FAILURE_TOKENS = (
+    "exit status", "failed", "error", "unhealthy", "crash", "backoff",
+    "bad gateway", "unavailable",
+)
+
+
+def _has_token(output: str, tokens: tuple[str, ...]) -> bool:
+    lowered = output.lower()
+    return any(t in lowered for t in tokens)
+
+
 # Track recent errors for escalation
-ERROR_LOG_PATH_TEMPLATE = ".claude/bash-error-log.json"
+ERROR_LOG_PATH_TEMPLATE = ".claude/bash-error-log.jsonl"
 MAX_ERROR_LOG_ENTRIES = 20
+ERROR_LOG_TAIL_BYTES = 4096        # Comfortably holds MAX_ERROR_LOG_ENTRIES lines
+ERROR_LOG_COMPACT_BYTES = 65536    # Rewrite to the last entries past this size
 ESCALATION_THRESHOLD = 3  # Same-pattern errors before escalation
 
+# Scan window for large outputs: error signatures land at the start
+# (early failures) or the end (final summary/traceback) of a log. A
+# signature buried mid-way through a multi-MB log may be missed, which
+# is acceptable for an advisory-only hook.
+SCAN_HEAD_CHARS = 4096
+SCAN_TAIL_CHARS = 12288
 
-def _match_error_patterns(output: str) -> list[str]:
-    """Match output against known error patterns, return advisory messages."""
-    advisories = []
-    for pattern, message_template in ERROR_PATTERNS:
-        match = re.search(pattern, output, re.IGNORECASE)
+
+def _match_patterns(patterns: tuple, output: str) -> list[str]:
+    """One message per matching pattern, in table order.
+
+    Each pattern is searched independently, so matches that overlap
+    (e.g. a ModuleNotFoundError inside a SyntaxError line) are all reported.
+    """
+    messages = []
+    for pattern, message_template in patterns:
+        match = pattern.search(output)
         if match:
             groups = match.groups()
             try:
                 msg = message_template.format(*groups) if groups else message_template
             except (IndexError, KeyError):
                 msg = message_template
-            advisories.append(msg)
-    return advisories[:3]  # Cap at 3 advisories per invocation
+            messages.append(msg)
+    return messages
+
+
+def _scan_window(output: str) -> str:
+    """Head + tail slice of output bounded to SCAN_HEAD/TAIL_CHARS."""
+    if len(output) <= SCAN_HEAD_CHARS + SCAN_TAIL_CHARS:
+        return output
+    return output[:SCAN_HEAD_CHARS] + "\n" + output[-SCAN_TAIL_CHARS:]
+
+
+def _match_error_patterns(output: str) -> list[str]:
+    """Match output against known error patterns, return advisory messages."""
+    if not _has_token(output, _ERROR_TOKENS):
+        return []
+    return _match_patterns(ERROR_PATTERNS, output)[:3]  # Cap at 3 advisories per invocation
 
 
 def _match_deploy_failures(output: str, command: str) -> list[str]:
@@ -126,53 +180,60 @@ def _match_deploy_failures(output: str, command: str) -> list[str]:
     deploy_keywords = ["deploy", "push", "eas", "workflow", "kubectl", "az webapp", "gh run", "docker"]
     if not any(kw in command.lower() for kw in deploy_keywords):
         return advisories
-    for pattern, message_template in DEPLOY_FAILURE_PATTERNS:
-        match = re.search(pattern, output, re.IGNORECASE)
-        if match:
-            groups = match.groups()
-            try:
-                msg = message_template.format(*groups) if groups else message_template
-            except (IndexError, KeyError):
-                msg = message_template
-            advisories.append(f"DEPLOY FAILURE: {msg}")
-    return advisories[:2]
+    if not _has_token(output, _DEPLOY_FAILURE_TOKENS):
+        return advisories
+    for msg in _match_patterns(DEPLOY_FAILURE_PATTERNS, output)[:2]:
+        advisories.append(f"DEPLOY FAILURE: {msg}")
+    return advisories
 
 
 def _track_error(cwd: str, pattern_key: str) -> int:
-    """Track error occurrence, return count of recent same-pattern errors."""
+    """Track error occurrence, return count of recent same-pattern errors.
+
+    The log is append-only JSONL: each call appends one line and reads
+    back only the tail, instead of rewriting the whole log. It is
+    compacted to the last MAX_ERROR_LOG_ENTRIES lines once it grows
+    past ERROR_LOG_COMPACT_BYTES.
+    """
     log_path = Path(cwd) / ERROR_LOG_PATH_TEMPLATE
+    now = time.time()
     try:
         log_path.parent.mkdir(parents=True, exist_ok=True)
-        entries = []
-        if log_path.exists():
-            entries = json.loads(log_path.read_text()).get("errors", [])
-
-        # Add new entry
-        entries.append({
-            "pattern": pattern_key,
-            "ts": time.time(),
-        })
-
-        # Keep only recent entries
-        entries = entries[-MAX_ERROR_LOG_ENTRIES:]
-
-        log_path.write_text(json.dumps({"errors": entries}, indent=2))
+        with open(log_path, "ab+") as f:
+            f.write(json.dumps({"pattern": pattern_key, "ts": now}).encode() + b"\n")
+            size = f.tell()
+            f.seek(max(0, size - ERROR_LOG_TAIL_BYTES))
+            tail = f.read().split(b"\n")
+        if size > ERROR_LOG_TAIL_BYTES:
+            tail = tail[1:]  # First line may be cut mid-entry
+        lines = [line for line in tail if line][-MAX_ERROR_LOG_ENTRIES:]
+
+        if size > ERROR_LOG_COMPACT_BYTES:
+            tmp = log_path.with_name(f".{log_path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(b"\n".join(lines) + b"\n")
+            os.replace(tmp, log_path)
 
         # Count recent same-pattern errors (last 5 minutes)
-        cutoff = time.time() - 300
-        recent_same = [
-            e for e in entries
-            if e.get("pattern") == pattern_key and e.get("ts", 0) > cutoff
-        ]
-        return len(recent_same)
-    except (IOError, json.JSONDecodeError):
+        cutoff = now - 300
+        count = 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("pattern") == pattern_key and entry.get("ts", 0) > cutoff:
+                count += 1
+        return count
+    except OSError:
         return 1
 
 
 def main():
     try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
+        input_data = json.loads(sys.stdin.buffer.read())
+    except ValueError:  # Empty, bad JSON or bad UTF-8
+        sys.exit(0)
+    if not isinstance(input_data, dict):
         sys.exit(0)
 
     cwd = input_data.get("cwd", "")
@@ -182,23 +243,26 @@ def main():
     if not cwd or not tool_output:
         sys.exit(0)
 
-    # Only advise in autonomous mode (casual sessions have user oversight)
-    session_id = input_data.get("session_id", "")
-    if not is_autonomous_mode_active(cwd, session_id):
-        sys.exit(0)
-
-    # Check for non-zero exit or error patterns in output
+    # Pattern matching is pure in-memory work, so it runs before the
+    # session-state lookup: most Bash calls are clean and exit here
+    # without touching disk.
     # Claude Code tool_output includes stderr; check for error signatures
-    advisories = _match_error_patterns(tool_output)
+    scan_output = _scan_window(tool_output)
+    advisories = _match_error_patterns(scan_output)
 
     # Check for deploy failures (with rollback suggestions)
     command = tool_input.get("command", "")
-    deploy_advisories = _match_deploy_failures(tool_output, command)
+    deploy_advisories = _match_deploy_failures(scan_output, command)
     advisories.extend(deploy_advisories)
 
     if not advisories:
         sys.exit(0)
 
+    # Only advise in autonomous mode (casual sessions have user oversight)
+    session_id = input_data.get("session_id", "")
+    if not is_autonomous_mode_active(cwd, session_id):
+        sys.exit(0)
+
     # Track for escalation
     pattern_key = advisories[0][:40]  # Use first 40 chars as key
     error_count = _track_error(cwd, pattern_key)
@@ -18,11 +18,13 @@ Options:
 from __future__ import annotations
 
 import argparse
-import shutil
+import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
+from stat import S_IMODE
 
 
 @dataclass
@@ -32,6 +34,7 @@ class CleanupStats:
     dirs_deleted: int = 0
     bytes_freed: int = 0
     errors: list[str] = field(default_factory=list)
+    messages: list[str] = field(default_factory=list)  # Per-item output, printed by main
 
     @property
     def mb_freed(self) -> float:
@@ -42,6 +45,60 @@ class CleanupStats:
         return self.bytes_freed / (1024 * 1024 * 1024)
 
 
+def _tree_size(path: str) -> int:
+    """Total size of regular files under path (one scandir walk, no re-stat)."""
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += _tree_size(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
+
+
+def _rmtree_counting(path: str) -> int:
+    """Delete path recursively, returning bytes of regular files removed.
+
+    Sizes are summed during the same walk that unlinks, rather than
+    sizing the tree first and letting rmtree walk it again. Best-effort
+    like rmtree(ignore_errors=True); a symlink is unlinked, never followed.
+    """
+    if os.path.islink(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return 0
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                total += _rmtree_counting(entry.path)
+                continue
+            size = entry.stat(follow_symlinks=False).st_size if entry.is_file(follow_symlinks=False) else 0
+            os.unlink(entry.path)
+            total += size
+        except OSError:
+            continue
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+    return total
+
+
 def cleanup_sessions(
     max_per_project: int = 20,
     max_age_days: int = 30,
@@ -56,18 +113,25 @@ def cleanup_sessions(
 
     cutoff_time = time.time() - (max_age_days * 24 * 60 * 60)
 
-    for project_dir in projects_dir.iterdir():
-        if not project_dir.is_dir():
-            continue
+    with os.scandir(projects_dir) as projects:
+        project_dirs = [Path(e.path) for e in projects if e.is_dir()]
 
-        # Get all session .jsonl files sorted by mtime (newest first)
+    for project_dir in project_dirs:
+        # Get all session .jsonl files sorted by mtime (newest first);
+        # DirEntry carries the type, so only the stat itself is a syscall
         session_files = []
-        for f in project_dir.glob("*.jsonl"):
+        try:
+            with os.scandir(project_dir) as it:
+                entries = [e for e in it if e.name.endswith(".jsonl") and e.is_file()]
+        except OSError as e:
+            stats.errors.append(f"Error accessing {project_dir}: {e}")
+            continue
+        for entry in entries:
             try:
-                stat = f.stat()
-                session_files.append((f, stat.st_mtime, stat.st_size))
+                stat = entry.stat()
+                session_files.append((Path(entry.path), stat.st_mtime, stat.st_size))
             except OSError as e:
-                stats.errors.append(f"Error accessing {f}: {e}")
+                stats.errors.append(f"Error accessing {entry.path}: {e}")
                 continue
 
         session_files.sort(key=lambda x: x[1], reverse=True)
@@ -77,7 +141,7 @@ def cleanup_sessions(
             should_delete = i >= max_per_project or mtime < cutoff_time
             if should_delete:
                 if dry_run:
-                    print(f"  Would delete: {session_file.name} ({size / 1024 / 1024:.1f} MB)")
+                    stats.messages.append(f"  Would delete: {session_file.name} ({size / 1024 / 1024:.1f} MB)")
                     stats.files_deleted += 1
                     stats.bytes_freed += size
                 else:
@@ -89,8 +153,7 @@ def cleanup_sessions(
                         # Also delete corresponding session directory if exists
                         session_dir = project_dir / session_file.stem
                         if session_dir.is_dir():
-                            dir_size = sum(f.stat().st_size for f in session_dir.rglob("*") if f.is_file())
-                            shutil.rmtree(session_dir, ignore_errors=True)
+                            dir_size = _rmtree_counting(str(session_dir))
                             stats.dirs_deleted += 1
                             stats.bytes_freed += dir_size
                     except OSError as e:
@@ -109,28 +172,30 @@ def cleanup_debug_files(max_age_days: int = 7, dry_run: bool = False) -> Cleanup
 
     cutoff_time = time.time() - (max_age_days * 24 * 60 * 60)
 
-    for item in debug_dir.iterdir():
+    with os.scandir(debug_dir) as it:
+        items = list(it)
+    for item in items:
         try:
             stat = item.stat()
             if stat.st_mtime < cutoff_time:
                 if item.is_file():
                     size = stat.st_size
                     if dry_run:
-                        print(f"  Would delete: debug/{item.name}")
+                        stats.messages.append(f"  Would delete: debug/{item.name}")
                     else:
-                        item.unlink()
+                        os.unlink(item.path)
                     stats.files_deleted += 1
                     stats.bytes_freed += size
                 elif item.is_dir():
-                    size = sum(f.stat().st_size for f in item.rglob("*") if f.is_file())
                     if dry_run:
-                        print(f"  Would delete: debug/{item.name}/")
+                        size = _tree_size(item.path)
+                        stats.messages.append(f"  Would delete: debug/{item.name}/")
                     else:
-                        shutil.rmtree(item, ignore_errors=True)
+                        size = _rmtree_counting(item.path)
                     stats.dirs_deleted += 1
                     stats.bytes_freed += size
         except OSError as e:
-            stats.errors.append(f"Error processing {item}: {e}")
+            stats.errors.append(f"Error processing {item.path}: {e}")
 
     return stats
 
@@ -143,14 +208,18 @@ def cleanup_session_env(dry_run: bool = False) -> CleanupStats:
     if not session_env_dir.exists():
         return stats
 
-    for session_dir in session_env_dir.iterdir():
+    with os.scandir(session_env_dir) as it:
+        session_dirs = [e for e in it if e.is_dir()]
+    for session_dir in session_dirs:
         try:
-            if session_dir.is_dir() and not any(session_dir.iterdir()):
-                if dry_run:
-                    print(f"  Would delete: session-env/{session_dir.name}/")
-                else:
-                    session_dir.rmdir()
-                stats.dirs_deleted += 1
+            with os.scandir(session_dir.path) as contents:
+                if next(contents, None) is not None:
+                    continue
+            if dry_run:
+                stats.messages.append(f"  Would delete: session-env/{session_dir.name}/")
+            else:
+                os.rmdir(session_dir.path)
+            stats.dirs_deleted += 1
         except OSError:
             pass
 
@@ -167,25 +236,56 @@ def cleanup_todos(max_age_days: int = 30, dry_run: bool = False) -> CleanupStats
 
     cutoff_time = time.time() - (max_age_days * 24 * 60 * 60)
 
-    for todo_file in todos_dir.iterdir():
+    with os.scandir(todos_dir) as it:
+        todo_files = [e for e in it if e.is_file()]
+    for todo_file in todo_files:
         try:
-            if todo_file.is_file():
-                stat = todo_file.stat()
-                if stat.st_mtime < cutoff_time:
-                    if dry_run:
-                        print(f"  Would delete: todos/{todo_file.name}")
-                    else:
-                        todo_file.unlink()
-                    stats.files_deleted += 1
-                    stats.bytes_freed += stat.st_size
+            stat = todo_file.stat()
+            if stat.st_mtime < cutoff_time:
+                if dry_run:
+                    stats.messages.append(f"  Would delete: todos/{todo_file.name}")
+                else:
+                    os.unlink(todo_file.path)
+                stats.files_deleted += 1
+                stats.bytes_freed += stat.st_size
         except OSError as e:
-            stats.errors.append(f"Error processing {todo_file}: {e}")
+            stats.errors.append(f"Error processing {todo_file.path}: {e}")
 
     return stats
 
 
+HISTORY_CHUNK_BYTES = 64 * 1024
+
+
+def _tail_offset(f, size: int, keep: int, ends_with_newline: bool) -> int:
+    """Byte offset where the last `keep` lines of f begin (reads backwards)."""
+    # The last `keep` lines start right after the (keep+1)th newline from
+    # the end, counting the trailing newline when the file has one
+    needed = keep + (1 if ends_with_newline else 0)
+    seen = 0
+    end = size
+    while end > 0:
+        start = max(0, end - HISTORY_CHUNK_BYTES)
+        f.seek(start)
+        chunk = f.read(end - start)
+        idx = len(chunk)
+        while True:
+            idx = chunk.rfind(b"\n", 0, idx)
+            if idx < 0:
+                break
+            seen += 1
+            if seen == needed:
+                return start + idx + 1
+        end = start
+    return 0
+
+
 def cleanup_history(max_entries: int = 1000, dry_run: bool = False) -> CleanupStats:
-    """Truncate history.jsonl to keep only recent entries."""
+    """Truncate history.jsonl to keep only recent entries.
+
+    Lines are counted chunk by chunk and the kept tail is located by
+    seeking backwards, so a large history is never split into a list.
+    """
     stats = CleanupStats()
     history_file = Path.home() / ".claude" / "history.jsonl"
 
@@ -193,30 +293,54 @@ def cleanup_history(max_entries: int = 1000, dry_run: bool = False) -> CleanupSt
         return stats
 
     try:
-        original_size = history_file.stat().st_size
-        lines = history_file.read_text().splitlines()
-
-        if len(lines) > max_entries:
-            entries_to_remove = len(lines) - max_entries
+        with open(history_file, "rb") as f:
+            st = os.fstat(f.fileno())
+            original_size = st.st_size
+            if not original_size:
+                return stats
+            newlines = 0
+            while chunk := f.read(HISTORY_CHUNK_BYTES):
+                newlines += chunk.count(b"\n")
+                last_byte = chunk[-1:]
+            ends_with_newline = last_byte == b"\n"
+            line_count = newlines + (0 if ends_with_newline else 1)
+
+            if line_count <= max_entries:
+                return stats
+            entries_to_remove = line_count - max_entries
             if dry_run:
-                print(f"  Would truncate history from {len(lines)} to {max_entries} entries")
+                stats.messages.append(f"  Would truncate history from {line_count} to {max_entries} entries")
                 stats.files_deleted = entries_to_remove
                 # Estimate size reduction
-                avg_line_size = original_size / len(lines)
+                avg_line_size = original_size / line_count
                 stats.bytes_freed = int(entries_to_remove * avg_line_size)
-            else:
-                # Keep the most recent entries
-                new_content = "\n".join(lines[-max_entries:]) + "\n"
-                history_file.write_text(new_content)
-                new_size = history_file.stat().st_size
-                stats.bytes_freed = original_size - new_size
-                stats.files_deleted = entries_to_remove
+                return stats
+
+            # Keep the most recent entries
+            f.seek(_tail_offset(f, original_size, max_entries, ends_with_newline))
+            tail = f.read()
+        if not ends_with_newline:
+            tail += b"\n"
+        tmp = history_file.with_name(f".{history_file.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(tail)
+        # The temp file gets umask-default permissions; keep the original's
+        os.chmod(tmp, S_IMODE(st.st_mode))
+        os.replace(tmp, history_file)
+        stats.bytes_freed = original_size - len(tail)
+        stats.files_deleted = entries_to_remove
     except OSError as e:
         stats.errors.append(f"Error processing history: {e}")
 
     return stats
 
 
+def _collect(stats: CleanupStats) -> CleanupStats:
+    """Print a finished phase's per-item messages and return its stats."""
+    for message in stats.messages:
+        print(message)
+    return stats
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Clean up Claude Code session data to reclaim disk space."
@@ -264,9 +388,18 @@ def main():
 
     total_stats = CleanupStats()
 
+    # The phases touch disjoint directories and are I/O-bound, so they
+    # run concurrently; results are reported below in fixed order
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        sessions = pool.submit(cleanup_sessions, max_sessions, max_days, dry_run)
+        debug = pool.submit(cleanup_debug_files, 7, dry_run)
+        session_env = pool.submit(cleanup_session_env, dry_run)
+        todos = pool.submit(cleanup_todos, max_days, dry_run)
+        history = pool.submit(cleanup_history, 1000, dry_run)
+
     # 1. Session transcripts
     print("Session transcripts (~/.claude/projects/)...")
-    stats = cleanup_sessions(max_sessions, max_days, dry_run)
+    stats = _collect(sessions.result())
     total_stats.files_deleted += stats.files_deleted
     total_stats.dirs_deleted += stats.dirs_deleted
     total_stats.bytes_freed += stats.bytes_freed
@@ -275,7 +408,7 @@ def main():
 
     # 2. Debug logs
     print("\nDebug logs (~/.claude/debug/)...")
-    stats = cleanup_debug_files(7, dry_run)
+    stats = _collect(debug.result())
     total_stats.files_deleted += stats.files_deleted
     total_stats.dirs_deleted += stats.dirs_deleted
     total_stats.bytes_freed += stats.bytes_freed
@@ -284,13 +417,13 @@ def main():
 
     # 3. Empty session-env directories
     print("\nEmpty session-env directories...")
-    stats = cleanup_session_env(dry_run)
+    stats = _collect(session_env.result())
     total_stats.dirs_deleted += stats.dirs_deleted
     print(f"  -> {stats.dirs_deleted} empty directories")
 
     # 4. Old todos
     print("\nOld todo files (~/.claude/todos/)...")
-    stats = cleanup_todos(max_days, dry_run)
+    stats = _collect(todos.result())
     total_stats.files_deleted += stats.files_deleted
     total_stats.bytes_freed += stats.bytes_freed
     total_stats.errors.extend(stats.errors)
@@ -298,7 +431,7 @@ def main():
 
     # 5. History truncation
     print("\nHistory file (~/.claude/history.jsonl)...")
-    stats = cleanup_history(1000, dry_run)
+    stats = _collect(history.result())
     if stats.files_deleted > 0:
         total_stats.bytes_freed += stats.bytes_freed
         print(f"  -> Removed {stats.files_deleted} old entries, {stats.mb_freed:.1f} MB")
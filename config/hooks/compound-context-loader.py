@@ -14,28 +14,51 @@ Part of the Compound Memory System that enables cross-session learning.
 
 from __future__ import annotations
 
+import heapq
 import json
+import os
 import subprocess
 import sys
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
 # Add hooks directory to path for shared imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-import glob as glob_mod
 import re
 
 from _common import log_debug, timed_hook, VERSION_TRACKING_EXCLUSIONS
 from _scoring import (
     build_file_components,
+    build_substring_haystack,
+    build_utility_eligible,
     entity_overlap_score,
     event_age_hours,
     score_event,
+    ts_epoch,
     ENTITY_GATE_BYPASS_HOURS,
     MIN_SCORE_SESSION_START,
 )
 
+# Memory primitives, imported once; main() exits quietly if unavailable
+try:
+    from _memory import (
+        cleanup_old_events,
+        compact_assertions,
+        get_events_by_entities,
+        get_project_hash,
+        get_recent_events,
+        get_utility_data,
+        query_all_projects,
+        read_assertions,
+        record_injection,
+    )
+    _MEMORY_OK = True
+except ImportError:
+    _MEMORY_OK = False
+
 MAX_EVENTS = 5
 MAX_CHARS_STANDALONE = 8000   # No native MEMORY.md present
 MAX_CHARS_INTEGRATED = 4500   # Native MEMORY.md consuming ~4-6K chars
@@ -54,18 +77,35 @@ BOOTSTRAP_SOURCES = frozenset({"async-task-bootstrap", "bootstrap"})
 # ============================================================================
 
 
+def _find_repo_root(cwd: str) -> str:
+    """Nearest ancestor of cwd containing .git, like git rev-parse --show-toplevel.
+
+    .git may be a directory or a worktree/submodule file; either marks
+    the top level. Returns "" outside a repository.
+    """
+    start = Path(cwd).resolve()
+    for parent in (start, *start.parents):
+        if (parent / ".git").exists():
+            return str(parent)
+    return ""
+
+
+def _read_stripped(path: Path) -> str:
+    """Read and strip a text file in one open; "" if it does not exist."""
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return ""
+
+
 def _detect_native_memory(cwd: str) -> tuple[bool, str]:
     """Detect if Claude's native MEMORY.md exists and return its content.
 
     Encodes the repo path the same way Claude Code does (replace / with -,
-    strip leading -). Falls back to glob if exact encoding fails.
+    strip leading -). Falls back to a project-name scan if exact encoding fails.
     """
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            capture_output=True, text=True, timeout=5, cwd=cwd,
-        )
-        repo_root = result.stdout.strip()
+        repo_root = _find_repo_root(cwd)
         if not repo_root:
             return False, ""
 
@@ -77,24 +117,21 @@ def _detect_native_memory(cwd: str) -> tuple[bool, str]:
             / f"-{encoded}" / "memory" / "MEMORY.md"
         )
 
-        if memory_path.exists():
-            content = memory_path.read_text(encoding="utf-8").strip()
-            if content:
-                return True, content
-
-        # Glob fallback: if encoding changed, find by project name
-        pattern = str(
-            Path.home() / ".claude" / "projects"
-            / "*-claude-code-toolkit" / "memory" / "MEMORY.md"
-        )
-        for match in glob_mod.glob(pattern):
-            p = Path(match)
-            if p.exists():
-                content = p.read_text(encoding="utf-8").strip()
+        content = _read_stripped(memory_path)
+        if content:
+            return True, content
+
+        # Fallback: if encoding changed, find by project name
+        projects_dir = Path.home() / ".claude" / "projects"
+        with os.scandir(projects_dir) as it:
+            for entry in it:
+                if not entry.name.endswith("-claude-code-toolkit"):
+                    continue
+                content = _read_stripped(Path(entry.path) / "memory" / "MEMORY.md")
                 if content:
                     return True, content
 
-    except (subprocess.TimeoutExpired, FileNotFoundError, OSError, IOError):
+    except OSError:
         pass
     return False, ""
 
@@ -114,14 +151,20 @@ _STOP_WORDS = frozenset({
     "using", "used", "first", "need", "instead", "rather",
 })
 
+_WORD_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9_-]{4,}")
+
+
+def _significant_words(content: str) -> set[str]:
+    """Lowercased words >4 chars, minus stop words."""
+    return set(_WORD_RE.findall(content.lower())) - _STOP_WORDS
+
 
 def _build_memory_tokens(content: str) -> set[str]:
     """Extract significant words from MEMORY.md for dedup matching.
 
     Returns lowercased words >4 chars, minus stop words.
     """
-    words = re.findall(r"[a-zA-Z][a-zA-Z0-9_-]{4,}", content.lower())
-    return {w for w in words if w not in _STOP_WORDS}
+    return _significant_words(content)
 
 
 def _event_overlaps_memory(event: dict, memory_tokens: set[str]) -> bool:
@@ -132,9 +175,7 @@ def _event_overlaps_memory(event: dict, memory_tokens: set[str]) -> bool:
     """
     if not memory_tokens:
         return False
-    content = event.get("content", "")
-    event_words = re.findall(r"[a-zA-Z][a-zA-Z0-9_-]{4,}", content.lower())
-    event_tokens = {w for w in event_words if w not in _STOP_WORDS}
+    event_tokens = _significant_words(event.get("content", ""))
     if len(event_tokens) < 3:
         return False  # Too few words to judge
     overlap = event_tokens & memory_tokens
@@ -146,29 +187,113 @@ def _event_overlaps_memory(event: dict, memory_tokens: set[str]) -> bool:
 # ============================================================================
 
 
+# Recent-commit file list, keyed by the HEAD it was computed at
+CHANGED_FILES_CACHE = Path(".claude") / "context-loader-changed-files.json"
+
+
+def _write_json_replace(path: Path, data: dict) -> None:
+    """Write compact JSON via a temp file + os.replace.
+
+    For regenerable per-session files: atomic against concurrent readers
+    but not fsynced, unlike _memory.atomic_write_json.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(exist_ok=True)
+        tmp.write_bytes(json.dumps(data, separators=(",", ":")).encode())
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _read_head_sha(repo_root: str) -> str | None:
+    """Resolve HEAD from the repo root's .git without spawning git (None if unsure)."""
+    git_dir = Path(repo_root) / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head or None  # Detached HEAD
+        ref = head[5:]
+        try:
+            return (git_dir / ref).read_text().strip() or None
+        except FileNotFoundError:
+            pass
+        with open(git_dir / "packed-refs") as f:
+            for line in f:
+                sha, _, name = line.rstrip("\n").partition(" ")
+                if name == ref:
+                    return sha
+    except OSError:
+        pass  # .git is a worktree/submodule file
+    return None
+
+
+def _recent_commit_files(cwd: str) -> list[str]:
+    """Files touched by the last 5 commits, cached per HEAD SHA.
+
+    The list is a pure function of HEAD, so the git log only reruns
+    after a commit, checkout or pull. A missing or corrupt cache falls
+    through to git. HEAD, the cache and the git log (whose "." pathspec
+    would otherwise narrow to cwd) all use the repo root, so sessions
+    started in a subdirectory get the same list and share the cache.
+    """
+    repo_root = _find_repo_root(cwd)
+    if not repo_root:
+        return []  # Outside a repository: git log would fail anyway
+    head = _read_head_sha(repo_root)
+    cache_path = Path(repo_root) / CHANGED_FILES_CACHE
+    if head:
+        try:
+            cached = json.loads(cache_path.read_text())
+            if cached.get("sha") == head:
+                return cached["files"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    result = subprocess.run(
+        ["git", "log", "--name-only", "--format=", "-5", "--"] + VERSION_TRACKING_EXCLUSIONS,
+        capture_output=True, text=True, timeout=5, cwd=repo_root,
+    )
+    files = sorted({line for line in result.stdout.splitlines() if line})
+
+    if head and result.returncode == 0:
+        try:
+            _write_json_replace(cache_path, {"sha": head, "files": files})
+        except OSError:
+            pass
+    return files
+
+
 def _get_changed_files(cwd: str) -> set[str]:
-    """Get files changed in recent commits + uncommitted changes."""
+    """Get files changed in recent commits + uncommitted changes.
+
+    The uncommitted diff is started first and runs concurrently with the
+    recent-commit lookup (cache read or git log).
+    """
     files = set()
     try:
         # Uncommitted changes (exclude .claude/ and other metadata)
-        result = subprocess.run(
+        diff = subprocess.Popen(
             ["git", "diff", "--name-only", "HEAD", "--"] + VERSION_TRACKING_EXCLUSIONS,
-            capture_output=True, text=True, timeout=5, cwd=cwd,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, cwd=cwd,
         )
-        for line in result.stdout.strip().split("\n"):
-            if line.strip():
-                files.add(line.strip())
+    except OSError:
+        return files
 
+    try:
         # Last 5 commits (exclude .claude/ and other metadata)
-        result = subprocess.run(
-            ["git", "log", "--name-only", "--format=", "-5", "--"] + VERSION_TRACKING_EXCLUSIONS,
-            capture_output=True, text=True, timeout=5, cwd=cwd,
-        )
-        for line in result.stdout.strip().split("\n"):
-            if line.strip():
-                files.add(line.strip())
-    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        files.update(_recent_commit_files(cwd))
+    except (subprocess.TimeoutExpired, OSError):
         pass
+
+    try:
+        out, _ = diff.communicate(timeout=5)
+    except subprocess.TimeoutExpired:
+        diff.kill()
+        diff.communicate()
+        return files
+    files.update(line for line in out.splitlines() if line)
     return files
 
 
@@ -177,24 +302,29 @@ def _get_changed_files(cwd: str) -> set[str]:
 # ============================================================================
 
 
-def _human_age(ts: str, now: datetime) -> str:
-    """Convert ISO timestamp to human-readable relative age."""
-    try:
-        event_time = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-        delta = now - event_time
-        hours = delta.total_seconds() / 3600
-        if hours < 1:
-            return "<1h"
-        if hours < 24:
-            return f"{int(hours)}h"
-        days = delta.days
-        if days < 7:
-            return f"{days}d"
-        if days < 30:
-            return f"{days // 7}w"
-        return f"{days // 30}mo"
-    except (ValueError, TypeError):
+def _human_age(ts: str, now_epoch: float) -> str:
+    """Convert ISO timestamp to human-readable relative age.
+
+    Uses the memoized ts_epoch() parse shared with scoring, so events
+    already scored this run cost no second datetime parse.
+    """
+    if not isinstance(ts, str) or not ts:
+        return "?"
+    epoch = ts_epoch(ts)
+    if epoch is None:
         return "?"
+    seconds = now_epoch - epoch
+    hours = seconds / 3600
+    if hours < 1:
+        return "<1h"
+    if hours < 24:
+        return f"{int(hours)}h"
+    days = int(seconds // 86400)
+    if days < 7:
+        return f"{days}d"
+    if days < 30:
+        return f"{days // 7}w"
+    return f"{days // 30}mo"
 
 
 def _budget_for_score(score: float) -> int:
@@ -210,14 +340,16 @@ def _truncate_content(content: str, max_len: int) -> str:
     """Truncate at sentence boundary if possible, preserving LESSON prefix."""
     if len(content) <= max_len:
         return content
-    trunc = content[:max_len]
-    # Try to cut at sentence boundary
-    last_period = trunc.rfind(". ")
-    last_newline = trunc.rfind("\n")
-    cut_point = max(last_period, last_newline)
-    if cut_point > max_len * 0.6:
-        return trunc[:cut_point + 1].rstrip()
-    return trunc.rstrip() + "..."
+    # Try to cut at a sentence boundary in the last 40% of the window;
+    # earlier boundaries are rejected anyway, so don't scan for them
+    start = int(max_len * 0.6) + 1
+    cut_point = max(
+        content.rfind(". ", start, max_len),
+        content.rfind("\n", start, max_len),
+    )
+    if cut_point >= 0:
+        return content[:cut_point + 1].rstrip()
+    return content[:max_len].rstrip() + "..."
 
 
 def _format_injection(scored_events: list[tuple[dict, float]]) -> str:
@@ -226,7 +358,7 @@ def _format_injection(scored_events: list[tuple[dict, float]]) -> str:
     Score-tiered budget: high-score events get more space for richer content.
     Shows concept tags alongside file names for retrieval transparency.
     """
-    now = datetime.now(timezone.utc)
+    now_epoch = time.time()
     event_count = 0
     parts = []
 
@@ -244,20 +376,22 @@ def _format_injection(scored_events: list[tuple[dict, float]]) -> str:
 
         entities = event.get("entities", [])
 
-        # Separate file entities and concept entities
-        file_entities = [
-            e.split("/")[-1] for e in entities
-            if "." in e.split("/")[-1]
-        ][:3]
-        concept_entities = [
-            e for e in entities
-            if "/" not in e and "." not in e
-        ][:5]
+        # Separate file entities and concept entities in one pass
+        file_entities, concept_entities = [], []
+        for e in entities:
+            name = e.rpartition("/")[2]
+            if "." in name:
+                if len(file_entities) < 3:
+                    file_entities.append(name)
+            elif name == e and len(concept_entities) < 5:
+                concept_entities.append(e)
+            if len(file_entities) == 3 and len(concept_entities) == 5:
+                break
 
         files_attr = ", ".join(file_entities) if file_entities else ""
         tags_attr = ", ".join(concept_entities) if concept_entities else ""
 
-        age_str = _human_age(event.get("ts", ""), now)
+        age_str = _human_age(event.get("ts", ""), now_epoch)
         # Category: top-level first, fall back to meta for backward compatibility
         cat = event.get("category", "") or event.get("meta", {}).get("category", "session")
 
@@ -282,9 +416,8 @@ def _format_injection(scored_events: list[tuple[dict, float]]) -> str:
         "At stop: list any that helped in memory_that_helped (e.g., [\"m1\", \"m3\"]).\n"
     )
     body = "\n\n".join(parts)
-    footer = "\n</memories>"
-
-    return header + "\n" + body + footer
+    # One f-string: no header + body + footer intermediate copies
+    return f"{header}\n{body}\n</memories>"
 
 
 # ============================================================================
@@ -296,18 +429,19 @@ def _get_doc_debt(cwd: str) -> str:
     """Check for documentation debt and return brief injection if present."""
     debt_path = Path(cwd) / ".claude" / "doc-debt.json"
     try:
-        if not debt_path.exists():
-            return ""
+        # Bounded by doc-updater-async (MAX_DEBT_ENTRIES x 10 files), so a
+        # full parse is cheap; a missing file is the common case
         debt = json.loads(debt_path.read_text())
         entries = debt.get("entries", [])
         if not entries:
             return ""
 
-        # Collect unique changed files across all debt entries
-        all_files = set()
-        for e in entries:
-            for f in e.get("changed_files", []):
-                all_files.add(f.split("/")[-1])  # basename only
+        # Collect unique changed files across all debt entries (basename only)
+        all_files = {
+            f.rpartition("/")[2]
+            for e in entries
+            for f in e.get("changed_files", [])
+        }
 
         files_str = ", ".join(sorted(all_files)[:8])
         return (
@@ -332,25 +466,26 @@ def main():
     if not cwd:
         sys.exit(0)
 
-    # Detect native MEMORY.md and adjust context budget
-    has_native_memory, native_content = _detect_native_memory(cwd)
-    effective_max_chars = MAX_CHARS_INTEGRATED if has_native_memory else MAX_CHARS_STANDALONE
-    memory_tokens = _build_memory_tokens(native_content) if has_native_memory else set()
-
-    # Import memory primitives
-    try:
-        from _memory import get_recent_events, get_events_by_entities, cleanup_old_events
-    except ImportError:
+    if not _MEMORY_OK:
         log_debug(
             "Cannot import _memory module",
             hook_name="compound-context-loader",
         )
         sys.exit(0)
 
+    # Changed files (needed for both index query and scoring) come from git
+    # subprocesses; look them up on a thread so the waits overlap the
+    # assertion and event-cleanup file I/O below
+    changed_result: list[set[str]] = []
+    git_thread = threading.Thread(
+        target=lambda: changed_result.append(_get_changed_files(cwd)),
+        daemon=True,
+    )
+    git_thread.start()
+
     # Compact and inject core assertions BEFORE event scoring
     assertions_block = ""
     try:
-        from _memory import compact_assertions, read_assertions
         compact_assertions(cwd)
         assertions = read_assertions(cwd)
         if assertions:
@@ -364,7 +499,7 @@ def main():
                 + "\n".join(assertion_lines)
                 + "\n</core-assertions>"
             )
-    except (ImportError, Exception):
+    except Exception:
         pass
 
     # Cleanup old events at session start
@@ -378,8 +513,8 @@ def main():
     except Exception:
         pass
 
-    # Get changed files for context (needed for both index query and scoring)
-    changed_files = _get_changed_files(cwd)
+    git_thread.join()
+    changed_files = changed_result[0] if changed_result else set()
     basenames, stems, dirs = build_file_components(changed_files)
 
     # Build query entities for inverted index lookup
@@ -411,39 +546,51 @@ def main():
         )
         sys.exit(0)
 
+    # Detect native MEMORY.md and adjust context budget (deferred until
+    # there are events to dedup and format)
+    has_native_memory, native_content = _detect_native_memory(cwd)
+    effective_max_chars = MAX_CHARS_INTEGRATED if has_native_memory else MAX_CHARS_STANDALONE
+    memory_tokens = _build_memory_tokens(native_content) if has_native_memory else set()
+
     # Load utility data for citation-rate bonus
     try:
-        from _memory import get_utility_data
         utility_data = get_utility_data(cwd)
-    except (ImportError, Exception):
+    except Exception:
         utility_data = None
+    eligible_ids = build_utility_eligible(utility_data)
 
     # 2-signal scoring with time-bound entity gate + utility bonus
 
+    now_epoch = time.time()
+    haystack = build_substring_haystack(stems, dirs)
     scored = []
     gated_count = 0
     dedup_count = 0
     for event in events:
-        entity_score = entity_overlap_score(event, basenames, stems, dirs)
+        entity_score = entity_overlap_score(event, basenames, stems, dirs, haystack)
         # Time-bound entity gate: reject zero-overlap events only if >= 4h old.
         # Fresh events (<4h) bypass to let recency compensate.
-        if entity_score == 0.0 and event_age_hours(event) >= ENTITY_GATE_BYPASS_HOURS:
+        if (
+            entity_score == 0.0
+            and event_age_hours(event, now_epoch) >= ENTITY_GATE_BYPASS_HOURS
+        ):
             gated_count += 1
             continue
         # Dedup guard: skip events whose content overlaps MEMORY.md
         if memory_tokens and _event_overlaps_memory(event, memory_tokens):
             dedup_count += 1
             continue
-        score = score_event(event, basenames, stems, dirs, utility_data)
+        score = score_event(
+            event, basenames, stems, dirs, eligible_ids, now_epoch, haystack,
+            entity_score=entity_score,
+        )
         if score >= MIN_SCORE_SESSION_START:
             scored.append((event, score))
-    scored.sort(key=lambda x: x[1], reverse=True)
 
     # Federated cross-project recall (opt-in via MEMORIES.md flag)
     cross_project_events = []
     if has_native_memory and "cross_project_recall: true" in native_content:
         try:
-            from _memory import query_all_projects, get_project_hash
             # Only use concept entities (not file paths) for cross-project search
             concept_queries = {
                 e for e in query_entities
@@ -456,7 +603,10 @@ def main():
                 )
                 for evt in cross_events:
                     # Score cross-project events but with a penalty (no file entity matches possible)
-                    score = score_event(evt, basenames, stems, dirs, utility_data)
+                    score = score_event(
+                        evt, basenames, stems, dirs, eligible_ids, now_epoch,
+                        haystack,
+                    )
                     if score >= MIN_SCORE_SESSION_START:
                         cross_project_events.append((evt, score))
                 if cross_project_events:
@@ -467,11 +617,12 @@ def main():
                             "sources": [e.get("_source_project", "?") for e, _ in cross_project_events],
                         },
                     )
-        except (ImportError, Exception) as e:
+        except Exception as e:
             log_debug(f"Cross-project recall failed: {e}", hook_name="compound-context-loader")
 
     # Take top N (local first, then cross-project fills remaining slots)
-    top_events = scored[:MAX_EVENTS]
+    # nlargest is stable like sort(reverse=True)[:n] but keeps only n items
+    top_events = heapq.nlargest(MAX_EVENTS, scored, key=lambda x: x[1])
     remaining_slots = MAX_EVENTS - len(top_events)
     if remaining_slots > 0 and cross_project_events:
         # Avoid duplicating events already selected
@@ -519,7 +670,6 @@ def main():
 
     # Record injections for utility tracking (citation feedback loop)
     try:
-        from _memory import record_injection, get_utility_data, atomic_write_json
         injected_ids = [e.get("id", "") for e, _ in top_events if e.get("id")]
         if injected_ids:
             record_injection(cwd, injected_ids)
@@ -528,9 +678,11 @@ def main():
 
     # Write injection log for mid-session recall (read by memory-recall.py)
     try:
-        session_id = ""
+        # The SessionStart envelope carries the id; the snapshot (written by
+        # session-init, possibly concurrently) is only a fallback
+        session_id = input_data.get("session_id", "")
         snap_path = Path(cwd) / ".claude" / "session-snapshot.json"
-        if snap_path.exists():
+        if not session_id and snap_path.exists():
             session_id = json.loads(snap_path.read_text()).get("session_id", "")
         log_path = Path(cwd) / ".claude" / "injection-log.json"
         log_data = {
@@ -544,7 +696,7 @@ def main():
                 for i, (e, s) in enumerate(top_events) if e.get("id")
             ],
         }
-        atomic_write_json(log_path, log_data)
+        _write_json_replace(log_path, log_data)
     except Exception:
         pass
 
@@ -33,10 +33,7 @@ from pathlib import Path
 # Add hooks directory to path for shared imports
 sys.path.insert(0, str(Path(__file__).parent))
 from _common import log_debug, get_code_version
-from _session import (
-    is_autonomous_mode_active,
-    get_autonomous_state,
-)
+from _session import get_autonomous_state
 
 # Patterns that indicate deployment commands
 DEPLOY_COMMAND_PATTERNS = [
@@ -76,25 +73,48 @@ PRODUCTION_PERMISSION_PATTERNS = [
     r"push.*prod",
 ]
 
+
+def _union(patterns: list[str]) -> re.Pattern:
+    """Compile patterns into one case-insensitive alternation."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+
+# Every DEPLOY_COMMAND_PATTERNS match contains one of these (lowercased);
+# most Bash commands contain none, and substring tests beat a regex scan
+_DEPLOY_TOKENS = ("eas", "gh", "git", "az", "kubectl")
+_DEPLOY_TOKENS_BYTES = tuple(t.encode() for t in _DEPLOY_TOKENS)
+
+# Compiled once at import: one scan per check instead of one per pattern
+_DEPLOY_COMMAND_RE = _union(DEPLOY_COMMAND_PATTERNS)
+_CONCURRENT_CHECK_RE = _union(CONCURRENT_CHECK_PATTERNS)
+_PRODUCTION_RE = _union(PRODUCTION_PATTERNS)
+_PRODUCTION_PERMISSION_RE = _union(PRODUCTION_PERMISSION_PATTERNS)
+_GIT_PUSH_RE = re.compile(r"git\s+push", re.IGNORECASE)
+_EAS_BUILD_RE = re.compile(r"\beas\s+build\b", re.IGNORECASE)
+_ANDROID_PLATFORM_RE = re.compile(r"(--platform|-p)\s+android\b", re.IGNORECASE)
+_IOS_PLATFORM_RE = re.compile(r"(--platform|-p)\s+ios\b", re.IGNORECASE)
+
 # OAuth goal-verification marker (project-agnostic)
 OAUTH_MARKER_RELATIVE_PATH = Path(".claude/oauth-goal-validation.json")
 OAUTH_MARKER_MAX_AGE_MS = 2 * 60 * 60 * 1000  # 2 hours
 
+# Short-lived cache of a non-empty running-workflows result (see
+# running_workflows_cached)
+RUNNING_WORKFLOWS_CACHE = Path(".claude/deploy-enforcer-running.json")
+RUNNING_WORKFLOWS_CACHE_TTL_SECONDS = 15
+
 
 def is_deploy_command(command: str) -> bool:
     """Check if command is a deployment command."""
-    for pattern in DEPLOY_COMMAND_PATTERNS:
-        if re.search(pattern, command, re.IGNORECASE):
-            return True
-    return False
+    lowered = command.lower()
+    if not any(t in lowered for t in _DEPLOY_TOKENS):
+        return False
+    return _DEPLOY_COMMAND_RE.search(command) is not None
 
 
 def is_production_target(command: str) -> bool:
     """Check if command targets production environment."""
-    for pattern in PRODUCTION_PATTERNS:
-        if re.search(pattern, command, re.IGNORECASE):
-            return True
-    return False
+    return _PRODUCTION_RE.search(command) is not None
 
 
 def has_production_permission(state: dict) -> bool:
@@ -112,23 +132,22 @@ def has_production_permission(state: dict) -> bool:
             continue
 
         prompt_text = prompt_entry.get("prompt", "")
-        for pattern in PRODUCTION_PERMISSION_PATTERNS:
-            if re.search(pattern, prompt_text, re.IGNORECASE):
-                log_debug(f"Production permission found: {prompt_text}")
-                return True
+        if _PRODUCTION_PERMISSION_RE.search(prompt_text):
+            log_debug(f"Production permission found: {prompt_text}")
+            return True
 
     return False
 
 
 def is_ios_eas_build_command(command: str) -> bool:
     """Check whether command is an iOS EAS build invocation."""
-    if not re.search(r"\beas\s+build\b", command, re.IGNORECASE):
+    if not _EAS_BUILD_RE.search(command):
         return False
 
-    if re.search(r"(--platform|-p)\s+android\b", command, re.IGNORECASE):
+    if _ANDROID_PLATFORM_RE.search(command):
         return False
 
-    return bool(re.search(r"(--platform|-p)\s+ios\b", command, re.IGNORECASE))
+    return _IOS_PLATFORM_RE.search(command) is not None
 
 
 def _has_oauth_verification_script(app_dir: Path) -> bool:
@@ -147,12 +166,22 @@ def _has_oauth_verification_script(app_dir: Path) -> bool:
     ]:
         if script_path.exists():
             return True
-    # Also check if the OAuth marker directory exists (created by a previous verification)
-    if (app_dir / OAUTH_MARKER_RELATIVE_PATH).parent.exists():
-        marker = app_dir / OAUTH_MARKER_RELATIVE_PATH
-        if marker.exists():
-            return True
-    return False
+    # Also check if the OAuth marker exists (created by a previous verification)
+    return (app_dir / OAUTH_MARKER_RELATIVE_PATH).exists()
+
+
+def _oauth_app_candidates(start: Path):
+    """Yield candidate app directories from start up to the filesystem root."""
+    # Direct: running from the app directory
+    yield start
+
+    # Monorepo: running from repo root, app is in packages/mobile
+    yield start / "packages" / "mobile"
+
+    # Walk up parents for nested working directories
+    for parent in start.parents:
+        yield parent
+        yield parent / "packages" / "mobile"
 
 
 def find_oauth_gated_app_dir(cwd: str) -> Path | None:
@@ -163,25 +192,14 @@ def find_oauth_gated_app_dir(cwd: str) -> Path | None:
     Project-agnostic: works for any Expo app with the verification pattern.
     """
     start = Path(cwd).resolve()
-    candidates = []
-
-    # Direct: running from the app directory
-    candidates.append(start)
-
-    # Monorepo: running from repo root, app is in packages/mobile
-    candidates.append(start / "packages" / "mobile")
-
-    # Walk up parents for nested working directories
-    for parent in start.parents:
-        candidates.append(parent)
-        candidates.append(parent / "packages" / "mobile")
+    seen: set[Path] = set()
 
-    seen = set()
-    for candidate in candidates:
-        resolved = str(candidate)
-        if resolved in seen:
+    # Probe lazily and stop at the first hit; seen skips repeats (e.g.
+    # start reappearing as a parent's packages/mobile)
+    for candidate in _oauth_app_candidates(start):
+        if candidate in seen:
             continue
-        seen.add(resolved)
+        seen.add(candidate)
         if _has_oauth_verification_script(candidate):
             return candidate
 
@@ -191,7 +209,9 @@ def find_oauth_gated_app_dir(cwd: str) -> Path | None:
 def validate_oauth_goal_marker(mobile_dir: Path) -> tuple[bool, str]:
     """Validate OAuth user-goal marker for current code version."""
     marker_path = mobile_dir / OAUTH_MARKER_RELATIVE_PATH
-    if not marker_path.exists():
+    try:
+        data = marker_path.read_bytes()
+    except FileNotFoundError:
         return (
             False,
             (
@@ -199,10 +219,12 @@ def validate_oauth_goal_marker(mobile_dir: Path) -> tuple[bool, str]:
                 "Run: bash packages/mobile/scripts/verify-oauth-user-goal.sh"
             ),
         )
+    except OSError:
+        return False, f"Invalid marker JSON at {marker_path}"
 
     try:
-        marker = json.loads(marker_path.read_text())
-    except (OSError, json.JSONDecodeError):
+        marker = json.loads(data)
+    except ValueError:
         return False, f"Invalid marker JSON at {marker_path}"
 
     if marker.get("status") != "passed":
@@ -240,35 +262,29 @@ def validate_oauth_goal_marker(mobile_dir: Path) -> tuple[bool, str]:
 def check_running_workflows(cwd: str) -> list[dict]:
     """Check for running or queued GitHub workflows.
 
+    The in_progress and queued listings are two independent API round
+    trips, so both gh processes run concurrently under one 10s deadline.
+
     Returns list of running/queued workflow runs, or empty list if none or error.
     """
+    procs = []
     try:
-        result = subprocess.run(
-            ["gh", "run", "list", "--status", "in_progress", "--json", "databaseId,name,status,conclusion"],
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            in_progress = json.loads(result.stdout)
-        else:
-            in_progress = []
-
-        # Also check queued
-        result = subprocess.run(
-            ["gh", "run", "list", "--status", "queued", "--json", "databaseId,name,status,conclusion"],
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            queued = json.loads(result.stdout)
-        else:
-            queued = []
+        for status in ("in_progress", "queued"):
+            procs.append(subprocess.Popen(
+                ["gh", "run", "list", "--status", status, "--json", "databaseId,name,status,conclusion"],
+                cwd=cwd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            ))
+
+        all_running = []
+        deadline = time.monotonic() + 10
+        for proc in procs:
+            out, _ = proc.communicate(timeout=max(0.0, deadline - time.monotonic()))
+            if proc.returncode == 0 and out.strip():
+                all_running.extend(json.loads(out))
 
-        all_running = in_progress + queued
         if all_running:
             log_debug(f"Found {len(all_running)} running/queued workflows: {[w.get('name') for w in all_running]}")
         return all_running
@@ -278,6 +294,43 @@ def check_running_workflows(cwd: str) -> list[dict]:
     except (json.JSONDecodeError, FileNotFoundError) as e:
         log_debug(f"Error checking running workflows: {e}")
         return []
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+                proc.communicate()
+
+
+def running_workflows_cached(cwd: str) -> list[dict]:
+    """check_running_workflows() with a 15s cache of positive results.
+
+    Only a non-empty list is reused, so a retried push or workflow run
+    while CI is busy is blocked again without another gh round trip.
+    An empty result is never cached: the previous push may have just
+    started a workflow, and the next deploy must look again.
+    """
+    cache_path = Path(cwd) / RUNNING_WORKFLOWS_CACHE
+    try:
+        if time.time() - cache_path.stat().st_mtime < RUNNING_WORKFLOWS_CACHE_TTL_SECONDS:
+            cached = json.loads(cache_path.read_text())
+            if isinstance(cached, list) and cached:
+                log_debug("Using cached running-workflows result")
+                return cached
+    except (OSError, ValueError):
+        pass
+
+    running = check_running_workflows(cwd)
+    try:
+        if running:
+            tmp = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+            cache_path.parent.mkdir(exist_ok=True)
+            tmp.write_text(json.dumps(running))
+            os.replace(tmp, cache_path)
+        else:
+            cache_path.unlink(missing_ok=True)
+    except OSError:
+        pass
+    return running
 
 
 def block_with_message(message: str, reason: str) -> None:
@@ -295,13 +348,16 @@ def block_with_message(message: str, reason: str) -> None:
 
 
 def main():
-    # Parse input from Claude Code
+    # Parse input from Claude Code. The raw envelope is a superset of the
+    # command, so if no deploy token appears anywhere in it the command
+    # cannot be a deploy: pass through without decoding or parsing.
+    stdin_data = sys.stdin.buffer.read()
+    lowered = stdin_data.lower()
+    if not any(t in lowered for t in _DEPLOY_TOKENS_BYTES):
+        sys.exit(0)
     try:
-        stdin_data = sys.stdin.read()
-        if not stdin_data.strip():
-            sys.exit(0)  # No input, pass through
         input_data = json.loads(stdin_data)
-    except json.JSONDecodeError:
+    except ValueError:
         sys.exit(0)  # Invalid JSON, pass through
 
     # Extract command and context
@@ -348,15 +404,12 @@ def main():
                     reason="Missing/stale OAuth user-goal verification marker",
                 )
 
-    # Check if autonomous mode is active
+    # Get the autonomous state to check coordinator status and permissions
+    # (None when autonomous mode is inactive).
     # Pass session_id to enable cross-directory trust for same session
-    if not is_autonomous_mode_active(cwd, session_id):
-        sys.exit(0)  # Not in autonomous mode, pass through
-
-    # Get the state to check coordinator status and permissions
-    state, state_type = get_autonomous_state(cwd, session_id)
+    state, _ = get_autonomous_state(cwd, session_id)
     if not state:
-        sys.exit(0)  # No state file, pass through
+        sys.exit(0)  # Not in autonomous mode, pass through
 
     # Rule 1: Subagents cannot deploy
     if state.get("coordinator") is False:
@@ -373,20 +426,15 @@ def main():
 
     # Rule 2: Block concurrent deploys (check for gh workflow run AND git push)
     # Git push triggers CI/CD in most repos, so we must check before pushing
-    should_check_concurrent = any(
-        re.search(pattern, command, re.IGNORECASE)
-        for pattern in CONCURRENT_CHECK_PATTERNS
-    )
-    if should_check_concurrent:
-        running_workflows = check_running_workflows(cwd)
+    if _CONCURRENT_CHECK_RE.search(command):
+        running_workflows = running_workflows_cached(cwd)
         if running_workflows:
             workflow_names = [w.get("name", "unknown") for w in running_workflows[:5]]
             workflow_ids = [str(w.get("databaseId", "?")) for w in running_workflows[:5]]
             log_debug(f"Blocking concurrent deploy: {len(running_workflows)} workflows already running")
 
             # Different message for git push vs gh workflow run
-            is_git_push = re.search(r"git\s+push", command, re.IGNORECASE)
-            if is_git_push:
+            if _GIT_PUSH_RE.search(command):
                 action_msg = (
                     "You're trying to push while CI/CD workflows are still running.\n"
                     "This would trigger additional workflows and cause deployment race conditions.\n\n"
@@ -22,62 +22,73 @@ Exit codes:
 from __future__ import annotations
 
 import json
-import re
 import subprocess
 import sys
-from datetime import datetime, timezone
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 from _common import log_debug, timed_hook
 
 # Patterns that indicate a commit was made
-GIT_COMMIT_PATTERNS = [
-    r"\bgit\s+commit\b",
-    r"\bgit\s+cherry-pick\b",
-    r"\bgit\s+merge\b",
-]
+GIT_COMMIT_SUBCOMMANDS = frozenset({"commit", "cherry-pick", "merge"})
+
+# Shell operators that start a new command segment ("||" is covered by "|")
+_SHELL_SEPARATORS = ("&&", "|", ";")
 
 # Updating these files clears doc debt (debt is paid)
 DOC_PATTERNS = {"docs/", "README.md", ".claude/MEMORIES.md", "CLAUDE.md"}
 
+# Split once so touches_docs() can use C-level tuple startswith/endswith:
+# "dir/" patterns match as prefixes, file patterns exactly or as a path tail
+_DOC_PREFIXES = tuple(p for p in DOC_PATTERNS if p.endswith("/"))
+_DOC_FILES = frozenset(p for p in DOC_PATTERNS if not p.endswith("/"))
+_DOC_SUFFIXES = tuple("/" + p for p in _DOC_FILES)
+
 MAX_DEBT_ENTRIES = 10
 
 
-def has_actual_git_command(command: str, patterns: list[str]) -> bool:
+def has_actual_git_command(command: str) -> bool:
     """Check if any command segment is actually a git operation.
 
-    Splits by shell operators and only matches segments starting with 'git'.
+    Splits by shell operators and newlines, then checks each segment's
+    first two words: 'git' followed by a commit-creating subcommand.
     Prevents false positives from echo/pipe arguments containing git strings.
     """
-    segments = re.split(r'\s*(?:&&|\|\||;|\|)\s*', command)
-    for segment in segments:
-        segment = segment.strip()
-        if segment.startswith("git ") or segment == "git":
-            for pattern in patterns:
-                if re.search(pattern, segment, re.IGNORECASE):
-                    return True
+    # Case-insensitive like the regexes this replaced (GIT also runs git
+    # on case-insensitive filesystems)
+    command = command.lower()
+    if "git" not in command:
+        return False  # No segment can start with git; skip the split
+    for sep in _SHELL_SEPARATORS:
+        command = command.replace(sep, "\n")
+    for segment in command.split("\n"):
+        words = segment.split(None, 2)
+        if len(words) >= 2 and words[0] == "git" and words[1] in GIT_COMMIT_SUBCOMMANDS:
+            return True
     return False
 
 
 def get_last_commit_info(cwd: str) -> tuple[str, str, list[str]]:
-    """Get commit hash, message, and changed files from HEAD."""
+    """Get commit hash, message, and changed files from HEAD.
+
+    One git log call prints the short hash, subject and file list
+    (renames shown as delete + add, like diff-tree).
+    """
     try:
-        hash_r = subprocess.run(
-            ["git", "rev-parse", "--short", "HEAD"],
-            capture_output=True, text=True, timeout=5, cwd=cwd,
-        )
-        msg_r = subprocess.run(
-            ["git", "log", "-1", "--format=%s"],
-            capture_output=True, text=True, timeout=5, cwd=cwd,
-        )
-        files_r = subprocess.run(
-            ["git", "diff-tree", "--no-commit-id", "--name-only", "-r", "HEAD"],
+        result = subprocess.run(
+            [
+                "git", "log", "-1", "--no-renames", "--no-show-signature",
+                "--format=%h%n%s", "--name-only", "HEAD",
+            ],
             capture_output=True, text=True, timeout=5, cwd=cwd,
         )
-        commit_hash = hash_r.stdout.strip()
-        message = msg_r.stdout.strip()
-        files = [f for f in files_r.stdout.strip().split("\n") if f.strip()]
+        if result.returncode != 0:
+            return "", "", []
+        lines = result.stdout.splitlines()
+        commit_hash = lines[0].strip() if lines else ""
+        message = lines[1].strip() if len(lines) > 1 else ""
+        files = [f for f in lines[2:] if f.strip()]
         return commit_hash, message, files
     except (subprocess.TimeoutExpired, FileNotFoundError):
         return "", "", []
@@ -85,14 +96,10 @@ def get_last_commit_info(cwd: str) -> tuple[str, str, list[str]]:
 
 def touches_docs(changed_files: list[str]) -> bool:
     """Check if any changed files are documentation."""
-    for f in changed_files:
-        for pattern in DOC_PATTERNS:
-            if pattern.endswith("/"):
-                if f.startswith(pattern):
-                    return True
-            elif f == pattern or f.endswith("/" + pattern):
-                return True
-    return False
+    return any(
+        f.startswith(_DOC_PREFIXES) or f in _DOC_FILES or f.endswith(_DOC_SUFFIXES)
+        for f in changed_files
+    )
 
 
 def main():
@@ -109,7 +116,7 @@ def main():
     if not cwd or not command:
         sys.exit(0)
 
-    if not has_actual_git_command(command, GIT_COMMIT_PATTERNS):
+    if not has_actual_git_command(command):
         sys.exit(0)
 
     commit_hash, message, changed_files = get_last_commit_info(cwd)
@@ -118,6 +125,7 @@ def main():
 
     debt_path = Path(cwd) / ".claude" / "doc-debt.json"
     debt_path.parent.mkdir(parents=True, exist_ok=True)
+    now_iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
     # Load existing debt
     debt = {"entries": []}
@@ -131,7 +139,7 @@ def main():
     if touches_docs(changed_files):
         debt = {
             "entries": [],
-            "last_doc_update": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "last_doc_update": now_iso,
         }
         debt_path.write_text(json.dumps(debt, indent=2))
         log_debug(
@@ -160,7 +168,7 @@ def main():
         "commit": commit_hash,
         "message": message[:120],
         "changed_files": code_files[:10],
-        "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "ts": now_iso,
     })
 
     # FIFO eviction
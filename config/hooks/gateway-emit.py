@@ -23,23 +23,32 @@ from pathlib import Path
 # Mimesis gateway Unix socket path
 FLEET_SOCKET = os.path.expanduser("~/.fleet/gateway.sock")
 
+# Transcript is scanned backwards from EOF in chunks of this size
+TRANSCRIPT_CHUNK_BYTES = 65536
 
-def emit_event(event: dict) -> bool:
-    """Send event to Mimesis gateway via Unix socket.
+
+def emit_events(events: list[dict]) -> bool:
+    """Send events to Mimesis gateway via Unix socket.
+
+    All events go out newline-delimited over one connection in a single
+    sendall, so a Stop hook with several content blocks pays one
+    connect instead of one per block.
 
     Returns True if successful, False otherwise.
     """
+    if not events:
+        return False
     socket_path = Path(FLEET_SOCKET)
     if not socket_path.exists():
         # Socket doesn't exist - daemon not running, silently skip
         return False
 
+    payload = "".join(json.dumps(event) + "\n" for event in events).encode()
     try:
-        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        sock.settimeout(1.0)  # 1 second timeout
-        sock.connect(str(socket_path))
-        sock.sendall((json.dumps(event) + "\n").encode())
-        sock.close()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)  # 1 second timeout
+            sock.connect(str(socket_path))
+            sock.sendall(payload)
         return True
     except Exception as e:
         # Log to stderr for debugging (won't affect hook behavior)
@@ -47,36 +56,57 @@ def emit_event(event: dict) -> bool:
         return False
 
 
+def _iter_lines_reversed(f):
+    """Yield the lines of a binary file from last to first.
+
+    Reads TRANSCRIPT_CHUNK_BYTES at a time from EOF. A line spanning
+    several chunks is assembled from a fragment list, so very long lines
+    (large tool results) are joined once rather than re-copied per chunk.
+    """
+    pos = f.seek(0, os.SEEK_END)
+    pieces = []  # Fragments of the line being assembled, last first
+    while pos > 0:
+        step = min(TRANSCRIPT_CHUNK_BYTES, pos)
+        pos -= step
+        f.seek(pos)
+        parts = f.read(step).split(b"\n")
+        pieces.append(parts[-1])
+        if len(parts) == 1:
+            continue
+        yield b"".join(reversed(pieces))
+        yield from reversed(parts[1:-1])
+        pieces = [parts[0]]
+    yield b"".join(reversed(pieces))
+
+
 def read_last_assistant_entry(transcript_path: str) -> dict | None:
     """Read the last assistant entry from a JSONL transcript.
 
     Claude Code maintains a JSONL transcript of the conversation.
     Each line is a JSON object with "role" (assistant/user/system) and "content".
+    The transcript grows for the whole session, so it is scanned from the
+    end and parsing stops at the first assistant line found.
     """
     if not transcript_path:
         return None
 
-    path = Path(transcript_path)
-    if not path.exists():
-        return None
-
-    last_assistant = None
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
+        with open(transcript_path, 'rb') as f:
+            for line in _iter_lines_reversed(f):
+                # Cheap sniff before parsing: most trailing lines are user
+                # or tool entries, and blank lines fail this test too
+                if b'"assistant"' not in line:
                     continue
                 try:
                     entry = json.loads(line)
-                    if entry.get("role") == "assistant":
-                        last_assistant = entry
-                except json.JSONDecodeError:
+                except ValueError:  # Bad JSON or bad UTF-8
                     continue
-    except Exception:
+                if isinstance(entry, dict) and entry.get("role") == "assistant":
+                    return entry
+    except OSError:
         pass
 
-    return last_assistant
+    return None
 
 
 def main():
@@ -115,13 +145,14 @@ def main():
         event["tool_result"] = hook_data.get("tool_result")
         event["phase"] = "pre" if hook_name == "PreToolUse" else "post"
         event["ok"] = hook_data.get("ok", True)
-        emit_event(event)
+        emit_events([event])
 
     # Handle Stop hook - extract text/thinking from JSONL transcript
     elif hook_name == "Stop":
         transcript_path = hook_data.get("transcript_path")
         assistant_entry = read_last_assistant_entry(transcript_path)
 
+        block_events = []
         if assistant_entry and "content" in assistant_entry:
             for block in assistant_entry.get("content", []):
                 if not isinstance(block, dict):
@@ -133,23 +164,22 @@ def main():
                 if block_type == "text":
                     text = block.get("text", "")
                     if text:
-                        text_event = {
+                        block_events.append({
                             **event,
                             "event_type": "text",
                             "text": text,
-                        }
-                        emit_event(text_event)
+                        })
 
                 # Thinking content block (extended thinking)
                 elif block_type == "thinking":
                     thinking = block.get("thinking", "")
                     if thinking:
-                        thinking_event = {
+                        block_events.append({
                             **event,
                             "event_type": "thinking",
                             "thinking": thinking,
-                        }
-                        emit_event(thinking_event)
+                        })
+        emit_events(block_events)
 
     # Handle Notification hook - emit as status change
     elif hook_name == "Notification":
@@ -157,7 +187,7 @@ def main():
         event["event_type"] = "status_change"
         event["from"] = "working"
         event["to"] = message[:50] if message else "notification"
-        emit_event(event)
+        emit_events([event])
 
 
 if __name__ == "__main__":
@@ -25,6 +25,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 from _common import log_debug, timed_hook
 from _scoring import (
     build_file_components,
+    build_substring_haystack,
     score_event,
     MIN_SCORE_RECALL,
 )
@@ -145,6 +146,8 @@ def main():
         pass
 
     # Score events against new entities using unified scoring
+    now_epoch = time.time()
+    haystack = build_substring_haystack(stems, dirs)
     scored = []
     for event in events:
         eid = event.get("id", "")
@@ -155,7 +158,10 @@ def main():
         if event.get("source") in {"async-task-bootstrap", "bootstrap"}:
             continue
 
-        score = score_event(event, basenames, stems, dirs)
+        score = score_event(
+            event, basenames, stems, dirs,
+            now_epoch=now_epoch, haystack=haystack,
+        )
         # In debugging mode, boost past debugging lessons
         if debugging_mode and event.get("category") in ("bugfix", "config"):
             score += 0.10
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+PostToolUse Dispatcher - runs the catch-all advisory checks in one process.
+
+Claude Code starts a separate interpreter for every registered hook, and
+both checks below fire after every tool call with the same input and the
+same _common/_session imports. Running them in-process here reads stdin
+once and pays one Python startup instead of two; their
+additionalContext strings are merged into a single response.
+
+Checks (each module remains runnable on its own via its main()):
+- verification-monitor.py       edits-without-verification nudges
+- autonomous-health-monitor.py  session health warnings
+
+A failing check is logged and skipped so it cannot suppress the other.
+Both share this hook's timeout, so the cheap, stateful verification
+check runs first: a slow git call in the health check must not cost an
+edits_since_verify update.
+
+Hook event: PostToolUse (matcher: *)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from _common import log_debug, timed_hook
+
+HOOKS_DIR = Path(__file__).parent
+
+CHECKS = ("verification-monitor", "autonomous-health-monitor")
+
+
+def _load_check(name: str):
+    """Import a hyphenated hook module by path and return its check()."""
+    spec = importlib.util.spec_from_file_location(
+        name.replace("-", "_"), HOOKS_DIR / f"{name}.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.check
+
+
+def main():
+    try:
+        input_data = json.loads(sys.stdin.buffer.read())
+    except ValueError:  # Empty, bad JSON or bad UTF-8
+        sys.exit(0)
+    if not isinstance(input_data, dict):
+        sys.exit(0)
+
+    contexts = []
+    for name in CHECKS:
+        try:
+            context = _load_check(name)(input_data)
+        except Exception as e:
+            log_debug(f"{name} check failed: {e}", hook_name="posttool-dispatcher")
+            continue
+        if context:
+            contexts.append(context)
+
+    if contexts:
+        print(json.dumps({
+            "hookSpecificOutput": {
+                "hookEventName": "PostToolUse",
+                "additionalContext": "\n\n".join(contexts),
+            }
+        }))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    with timed_hook("posttool-dispatcher"):
+        main()
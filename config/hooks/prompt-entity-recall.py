@@ -152,12 +152,19 @@ def main():
 
     # Score and filter
     try:
-        from _scoring import build_file_components, score_event, MIN_SCORE_RECALL
+        from _scoring import (
+            build_file_components,
+            build_substring_haystack,
+            score_event,
+            MIN_SCORE_RECALL,
+        )
     except ImportError:
         sys.exit(0)
 
     basenames, stems, dirs = build_file_components(entities)
 
+    now_epoch = time.time()
+    haystack = build_substring_haystack(stems, dirs)
     scored = []
     for event in events:
         eid = event.get("id", "")
@@ -167,7 +174,10 @@ def main():
             continue
         if event.get("meta", {}).get("archived_by"):
             continue
-        score = score_event(event, basenames, stems, dirs)
+        score = score_event(
+            event, basenames, stems, dirs,
+            now_epoch=now_epoch, haystack=haystack,
+        )
         # In debugging mode, boost bugfix/config events (past debugging lessons)
         if debugging_mode and event.get("category") in ("bugfix", "config"):
             score += 0.10
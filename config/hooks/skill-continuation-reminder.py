@@ -18,7 +18,7 @@ from pathlib import Path
 
 # Add hooks directory to path for shared imports
 sys.path.insert(0, str(Path(__file__).parent))
-from _session import is_autonomous_mode_active, get_mode
+from _session import get_mode
 
 
 def main():
@@ -33,12 +33,11 @@ def main():
     if tool_name != "Skill":
         sys.exit(0)
 
-    # Only inject context if in autonomous mode
-    if not is_autonomous_mode_active(cwd):
+    # Only inject context if in autonomous mode; one state lookup gives
+    # both activity and which mode is active (for appropriate messaging)
+    mode = get_mode(cwd)
+    if not mode:
         sys.exit(0)
-
-    # Determine which mode is active for appropriate messaging
-    mode = get_mode(cwd) or "unknown"
     MODE_INFO = {
         "repair": ("REPAIR", "fix-verify"),
         "melt": ("MELT", "task execution"),
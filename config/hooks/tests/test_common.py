@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for _common.py hook input helpers.
+
+Tests read_stdin_fields on small, large, missing-key, malformed and
+truncated envelopes.
+
+Run with: cd config/hooks && python3 -m pytest tests/test_common.py -v
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add hooks directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from _common import read_stdin_fields
+
+
+class _RecordingStream(io.BytesIO):
+    """BytesIO that records the size of every read."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.reads.append(len(data))
+        return data
+
+
+def _read(payload, keys, chunk_size=64):
+    raw = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    stream = io.BytesIO(raw)
+    result = read_stdin_fields(keys, stream=stream, chunk_size=chunk_size)
+    assert stream.tell() == len(raw), "stdin must always be consumed to EOF"
+    return result
+
+
+class TestReadStdinFields:
+    """Tests for read_stdin_fields: prefix scan with json.loads fallback."""
+
+    def test_small_input_single_chunk(self):
+        data = {"cwd": "/tmp", "tool_name": "Bash", "extra": [1, 2]}
+        assert _read(data, ("cwd", "tool_name"), chunk_size=4096) == {
+            "cwd": "/tmp", "tool_name": "Bash",
+        }
+
+    def test_keys_in_prefix_skip_large_tail(self):
+        data = {"cwd": "/tmp", "tool_name": "Write",
+                "tool_input": {"content": "x" * 100_000}}
+        assert _read(data, ("cwd", "tool_name")) == {"cwd": "/tmp", "tool_name": "Write"}
+
+    def test_large_wanted_value(self):
+        content = "é" * 200_000  # Multi-byte chars straddle chunk edges
+        data = {"cwd": "/tmp", "tool_input": {"content": content}}
+        result = _read(data, ("cwd", "tool_input"))
+        assert result["tool_input"]["content"] == content
+
+    def test_key_after_large_value(self):
+        data = {"tool_input": {"content": "x" * 100_000}, "session_id": "abc"}
+        assert _read(data, ("session_id",)) == {"session_id": "abc"}
+
+    def test_missing_key_absent(self):
+        data = {"cwd": "/tmp", "tool_response": "y" * 100_000}
+        assert _read(data, ("cwd", "tool_output")) == {"cwd": "/tmp"}
+
+    def test_number_at_chunk_edge_not_truncated(self):
+        raw = b'{"a": 12345678, "b": 1}'
+        for chunk_size in range(1, len(raw) + 2):
+            assert _read(raw, ("a",), chunk_size=chunk_size) == {"a": 12345678}
+
+    def test_large_input_parsed_once(self):
+        """A large tail is read once and decoded by a single json.loads."""
+        data = {"tool_input": {"content": "x" * 5_000_000}, "cwd": "/tmp"}
+        raw = json.dumps(data).encode()
+        stream = _RecordingStream(raw)
+        with patch("_common.json.loads", wraps=json.loads) as loads:
+            result = read_stdin_fields(("cwd", "tool_input"), stream=stream, chunk_size=4096)
+        assert result == data
+        assert loads.call_count == 1
+        assert sum(stream.reads) == len(raw)  # No byte is read twice
+        assert len(stream.reads) <= 3  # Prefix, rest, EOF probe at most
+
+    def test_empty_input(self):
+        assert _read(b"", ("cwd",)) is None
+
+    def test_not_an_object(self):
+        assert _read(b"[1, 2, 3]", ("cwd",)) is None
+        assert _read(b'"cwd"' + b" " * 100, ("cwd",)) is None
+
+    def test_malformed_input(self):
+        assert _read(b'{"cwd": /tmp}' + b" " * 100, ("cwd",)) is None
+        assert _read(b'{"cwd" "/tmp"}', ("cwd",)) is None
+
+    def test_non_string_key(self):
+        assert _read(b'{[1]: 2, "cwd": "/tmp"}' + b" " * 100, ("cwd",)) is None
+        assert _read(b"{1: 2}", ("cwd",)) is None
+
+    def test_truncated_input(self):
+        raw = json.dumps({"cwd": "/tmp", "tool_input": "z" * 1000}).encode()
+        assert _read(raw[:-10], ("tool_input",)) is None
+        assert _read(raw[:-10], ("cwd",), chunk_size=4096) is None
+
+    def test_invalid_utf8(self):
+        assert _read(b'{"cwd": "\xff\xfe"}', ("cwd",)) is None
@@ -75,23 +75,23 @@ def _is_verification_command(tool_input: dict) -> bool:
     return any(re.search(p, command, re.IGNORECASE) for p in VERIFY_PATTERNS)
 
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)
+def check(input_data: dict) -> str | None:
+    """Track edits/verification for one PostToolUse event.
 
+    Returns the reminder text when a nudge is due, else None. Shared by
+    main() and posttool-dispatcher.py.
+    """
     cwd = input_data.get("cwd", "")
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     session_id = input_data.get("session_id", "")
 
     if not cwd:
-        sys.exit(0)
+        return None
 
     # Only monitor in autonomous mode
     if not is_autonomous_mode_active(cwd, session_id):
-        sys.exit(0)
+        return None
 
     state = _load_state(cwd)
 
@@ -99,7 +99,7 @@ def main():
     if tool_name in EDIT_TOOLS:
         state["edits_since_verify"] = state.get("edits_since_verify", 0) + 1
         _save_state(cwd, state)
-        sys.exit(0)
+        return None
 
     # Reset counter on verification
     if tool_name == "Bash" and _is_verification_command(tool_input):
@@ -110,37 +110,49 @@ def main():
             )
         state["edits_since_verify"] = 0
         _save_state(cwd, state)
-        sys.exit(0)
+        return None
 
     # Check if nudge is needed
     edits = state.get("edits_since_verify", 0)
     last_nudge = state.get("last_nudge_ts", 0)
     now = time.time()
 
-    if edits >= NUDGE_THRESHOLD and (now - last_nudge) > NUDGE_COOLDOWN_SECONDS:
-        state["last_nudge_ts"] = now
-        _save_state(cwd, state)
+    if edits < NUDGE_THRESHOLD or (now - last_nudge) <= NUDGE_COOLDOWN_SECONDS:
+        return None
+
+    state["last_nudge_ts"] = now
+    _save_state(cwd, state)
 
-        output = {
+    log_debug(
+        f"Nudge: {edits} edits without verification",
+        hook_name="verification-monitor",
+    )
+    return (
+        f"VERIFICATION REMINDER: You've made {edits} edits without running "
+        "any verification (linters, tests, or functional checks). "
+        "The stop-validator will require verification.tests in your checkpoint. "
+        "Consider verifying now rather than discovering issues at exit.\n"
+        "Quick checks: ruff check . | npm run lint | python3 -c 'import ast; ...' | "
+        "curl <endpoint> | run your test suite"
+    )
+
+
+def main():
+    try:
+        input_data = json.loads(sys.stdin.buffer.read())
+    except ValueError:  # Empty, bad JSON or bad UTF-8
+        sys.exit(0)
+    if not isinstance(input_data, dict):
+        sys.exit(0)
+
+    context = check(input_data)
+    if context:
+        print(json.dumps({
             "hookSpecificOutput": {
                 "hookEventName": "PostToolUse",
-                "additionalContext": (
-                    f"VERIFICATION REMINDER: You've made {edits} edits without running "
-                    "any verification (linters, tests, or functional checks). "
-                    "The stop-validator will require verification.tests in your checkpoint. "
-                    "Consider verifying now rather than discovering issues at exit.\n"
-                    "Quick checks: ruff check . | npm run lint | python3 -c 'import ast; ...' | "
-                    "curl <endpoint> | run your test suite"
-                ),
+                "additionalContext": context,
             }
-        }
-
-        log_debug(
-            f"Nudge: {edits} edits without verification",
-            hook_name="verification-monitor",
-        )
-
-        print(json.dumps(output))
+        }))
     sys.exit(0)
 
 